@@ -0,0 +1,34 @@
+# 2026.10.18  23.00
+from sqlalchemy import text
+
+# ----- Session-level Postgres advisory locks -----
+# The lock lives as long as the session, not the Connection object: close() only returns the
+# session to the pool, still holding it. Release therefore unlocks explicitly, and a session
+# that can't run the unlock is invalidated, which closes it and drops the lock server-side.
+
+def _args(key: tuple) -> tuple:
+    # pg_*_advisory_lock(bigint) or (int, int)
+    return ", ".join(f":k{i}" for i in range(len(key))), {f"k{i}": k for i, k in enumerate(key)}
+
+def try_advisory_lock(engine, *key, label: str = "Advisory lock"):
+    # Returns the connection holding the lock, or None (taken elsewhere, or the DB is unreachable)
+    placeholders, params = _args(key)
+    conn = None
+    try:
+        conn = engine.connect().execution_options(isolation_level="AUTOCOMMIT")
+        if conn.execute(text(f"SELECT pg_try_advisory_lock({placeholders})"), params).scalar():
+            return conn
+    except Exception as e:
+        print(f"{label}: lock failed: {e}")
+    if conn is not None:
+        conn.close()
+    return None
+
+def release_advisory_lock(conn, *key):
+    placeholders, params = _args(key)
+    try:
+        conn.execute(text(f"SELECT pg_advisory_unlock({placeholders})"), params)
+    except Exception:
+        conn.invalidate()
+    finally:
+        conn.close()
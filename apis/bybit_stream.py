@@ -0,0 +1,121 @@
+# 2026.10.18  12.00
+import asyncio
+import json
+import os
+import time
+import websockets
+
+# ----- 1. CONFIGURATION -----
+STREAMING_ENABLED = os.getenv("BYBIT_STREAMING", "0") == "1"
+WS_URL = os.getenv("BYBIT_WS_URL", "wss://stream.bybit.com/v5/public/linear")
+PING_INTERVAL = 20       # Bybit drops idle connections after ~30s without a ping
+STALE_AFTER = 30         # seconds without a message before /fetch-all falls back to REST
+SUBSCRIBE_BATCH = 10     # topics per subscribe request
+
+
+# ----- 2. STREAM STATE -----
+class BybitStream:
+    def __init__(self, symbols: list, candle_cache, url: str = WS_URL, interval: str = "5"):
+        self.symbols = symbols
+        self.candle_cache = candle_cache
+        self.url = url
+        self.interval = interval
+        # "BTCUSDT" -> "BTC/USDT"
+        self.by_ws_symbol = {s.replace("/", ""): s for s in symbols}
+        self.tickers = {}
+        self.connected = False
+        self.last_message = 0.0
+        self._task = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self.connected = False
+
+    def is_live(self) -> bool:
+        return self.connected and time.monotonic() - self.last_message < STALE_AFTER
+
+    def ticker_view(self) -> dict:
+        # Same shape as ccxt fetch_tickers(): {"BTC/USDT:USDT": {"info": {...}}}
+        return {f"{s}:USDT": {"info": info} for s, info in self.tickers.items()}
+
+    # ----- 3. MESSAGE HANDLING -----
+    def handle(self, msg: dict):
+        topic = msg.get("topic")
+        if not topic:
+            return   # subscribe acks, pongs
+
+        self.last_message = time.monotonic()
+        kind, _, ws_symbol = topic.rpartition(".")
+        symbol = self.by_ws_symbol.get(ws_symbol)
+        if symbol is None:
+            return
+
+        if kind == f"kline.{self.interval}":
+            buf = self.candle_cache.get(symbol)
+            if buf is None:
+                return
+            for k in msg.get("data", []):
+                buf.update([int(k["start"]), float(k["open"]), float(k["high"]), float(k["low"]), float(k["close"]), float(k["volume"])])
+
+        elif kind == "tickers":
+            data = msg.get("data", {})
+            if msg.get("type") == "snapshot":
+                self.tickers[symbol] = dict(data)
+            else:
+                # Deltas only carry the fields that changed
+                self.tickers.setdefault(symbol, {}).update(data)
+
+    # ----- 4. CONNECTION LOOP -----
+    async def _subscribe(self, ws):
+        topics = [f"{t}.{s}" for s in self.by_ws_symbol for t in (f"kline.{self.interval}", "tickers")]
+        for i in range(0, len(topics), SUBSCRIBE_BATCH):
+            await ws.send(json.dumps({"op": "subscribe", "args": topics[i:i + SUBSCRIBE_BATCH]}))
+
+    async def _resync(self):
+        # Reload candles over REST so nothing missed while disconnected is lost
+        results = await asyncio.gather(*[self.candle_cache.resync(s) for s in self.symbols], return_exceptions=True)
+        for symbol, res in zip(self.symbols, results):
+            if isinstance(res, Exception):
+                print(f"Bybit stream resync failed for {symbol}: {res}")
+
+    async def _ping(self, ws):
+        while True:
+            await asyncio.sleep(PING_INTERVAL)
+            await ws.send(json.dumps({"op": "ping"}))
+
+    async def _run(self):
+        backoff = 1
+        while True:
+            try:
+                async with websockets.connect(self.url, ping_interval=None) as ws:
+                    await self._subscribe(ws)
+                    await self._resync()
+                    self.connected = True
+                    self.last_message = time.monotonic()
+                    backoff = 1
+
+                    pinger = asyncio.create_task(self._ping(ws))
+                    try:
+                        async for raw in ws:
+                            self.handle(json.loads(raw))
+                    finally:
+                        pinger.cancel()
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Bybit stream error: {e}")
+
+            self.connected = False
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 60)
@@ -0,0 +1,125 @@
+# 2026.10.18  10.00
+import asyncio
+import numpy as np
+from apis import indicators
+
+# ----- 1. RING BUFFER LAYOUT -----
+# One row per candle: ts, open, high, low, close, volume, ema
+TS, O, H, L, C, V, EMA = range(7)
+
+
+# ----- 2. PER-SYMBOL CANDLE BUFFER -----
+class CandleBuffer:
+    def __init__(self, capacity: int, ema_span: int):
+        self.capacity = capacity
+        self.ema_span = ema_span
+        self.alpha = 2 / (ema_span + 1)
+        self.data = np.zeros((capacity, 7), dtype=np.float64)
+        self.head = 0   # next slot to write
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def _idx(self, back: int) -> int:
+        # back=0 -> newest candle, back=1 -> the one before, ...
+        return (self.head - 1 - back) % self.capacity
+
+    def row(self, back: int = 0) -> np.ndarray:
+        return self.data[self._idx(back)]
+
+    @property
+    def last_ts(self):
+        return int(self.data[self._idx(0), TS]) if self.size else None
+
+    def window(self) -> np.ndarray:
+        # Ordered copy, oldest -> newest
+        if self.size < self.capacity:
+            return self.data[:self.size].copy()
+        return np.concatenate([self.data[self.head:], self.data[:self.head]])
+
+    def seed(self, ohlcv: list):
+        if not len(ohlcv):
+            self.head = self.size = 0
+            return
+        rows = np.asarray(ohlcv, dtype=np.float64)[-self.capacity:]
+        n = len(rows)
+        self.data[:n, :6] = rows[:, :6]
+        self.data[:n, EMA] = indicators.ema(rows[:, 4], self.ema_span)[0]
+
+        self.head = n % self.capacity
+        self.size = n
+
+    def update(self, candle: list):
+        ts = candle[0]
+        last_ts = self.last_ts
+        if last_ts is None:
+            return self.seed([candle])
+        if ts < last_ts:
+            return
+
+        if ts == last_ts:
+            # Still-forming candle changed: rewrite it on top of the previous EMA
+            idx = self._idx(0)
+            prev_ema = self.data[self._idx(1), EMA] if self.size > 1 else None
+        else:
+            idx = self.head
+            prev_ema = self.data[self._idx(0), EMA]
+            self.head = (self.head + 1) % self.capacity
+            self.size = min(self.size + 1, self.capacity)
+
+        self.data[idx, :6] = candle[:6]
+        close = float(candle[4])
+        self.data[idx, EMA] = close if prev_ema is None else self.alpha * close + (1 - self.alpha) * prev_ema
+
+
+# ----- 3. IN-PROCESS CACHE KEYED BY (SYMBOL, TIMEFRAME) -----
+class CandleCache:
+    def __init__(self, exchange, timeframe: str, capacity: int = 110, ema_span: int = 100, delta_limit: int = 5):
+        self.exchange = exchange
+        self.timeframe = timeframe
+        self.capacity = capacity
+        self.ema_span = ema_span
+        self.delta_limit = delta_limit
+        self.buffers = {}
+        self.locks = {}
+
+    def get(self, symbol: str):
+        return self.buffers.get((symbol, self.timeframe))
+
+    async def _reseed(self, buf: CandleBuffer, symbol: str):
+        ohlcv = await self.exchange.fetch_ohlcv(symbol, self.timeframe, limit=self.capacity)
+        buf.seed(ohlcv)
+
+    async def resync(self, symbol: str) -> CandleBuffer:
+        # Full REST reload, e.g. after a stream reconnect
+        key = (symbol, self.timeframe)
+        async with self.locks.setdefault(key, asyncio.Lock()):
+            buf = self.buffers.get(key) or CandleBuffer(self.capacity, self.ema_span)
+            await self._reseed(buf, symbol)
+            self.buffers[key] = buf
+            return buf
+
+    async def refresh(self, symbol: str) -> CandleBuffer:
+        key = (symbol, self.timeframe)
+        lock = self.locks.setdefault(key, asyncio.Lock())
+
+        async with lock:
+            buf = self.buffers.get(key)
+            if buf is None or not len(buf):
+                buf = CandleBuffer(self.capacity, self.ema_span)
+                await self._reseed(buf, symbol)
+                self.buffers[key] = buf
+                return buf
+
+            # Warm path: only candles from the last cached ts onwards
+            ohlcv = await self.exchange.fetch_ohlcv(symbol, self.timeframe, since=buf.last_ts, limit=self.delta_limit)
+
+            # Gap (missed more candles than one delta page) -> full resync
+            if not ohlcv or ohlcv[0][0] != buf.last_ts or len(ohlcv) >= self.delta_limit:
+                await self._reseed(buf, symbol)
+                return buf
+
+            for candle in ohlcv:
+                buf.update(candle)
+            return buf
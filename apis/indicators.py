@@ -0,0 +1,89 @@
+# 2026.10.18  11.00
+import numpy as np
+
+# ----- Batched indicator engine -----
+# Every function takes a (symbols x candles) matrix, oldest candle first,
+# and computes all symbols in one pass. 1-D input is treated as one symbol.
+
+def _as_2d(values) -> np.ndarray:
+    x = np.asarray(values, dtype=np.float64)
+    return x[None, :] if x.ndim == 1 else x
+
+# ----- 1. MOVING AVERAGES -----
+def sma(values, period: int) -> np.ndarray:
+    x = _as_2d(values)
+    out = np.full(x.shape, np.nan)
+    if x.shape[1] < period:
+        return out
+
+    csum = np.cumsum(x, axis=1)
+    out[:, period - 1] = csum[:, period - 1]
+    out[:, period:] = csum[:, period:] - csum[:, :-period]
+    out[:, period - 1:] /= period
+    return out
+
+def ema(values, period: int) -> np.ndarray:
+    # Same recursion as pandas ewm(span=period, adjust=False)
+    x = _as_2d(values)
+    alpha = 2 / (period + 1)
+    out = np.empty(x.shape)
+    if not x.shape[1]:
+        return out
+
+    out[:, 0] = x[:, 0]
+    for t in range(1, x.shape[1]):
+        out[:, t] = alpha * x[:, t] + (1 - alpha) * out[:, t - 1]
+    return out
+
+def rma(values, period: int) -> np.ndarray:
+    # Wilder smoothing, seeded with the SMA of the first `period` values
+    x = _as_2d(values)
+    out = np.full(x.shape, np.nan)
+    if x.shape[1] < period:
+        return out
+
+    out[:, period - 1] = x[:, :period].mean(axis=1)
+    for t in range(period, x.shape[1]):
+        out[:, t] = (out[:, t - 1] * (period - 1) + x[:, t]) / period
+    return out
+
+# ----- 2. OSCILLATORS / VOLATILITY -----
+def rsi(close, period: int = 14) -> np.ndarray:
+    c = _as_2d(close)
+    out = np.full(c.shape, np.nan)
+    if c.shape[1] <= period:
+        return out
+
+    diff = np.diff(c, axis=1)
+    avg_gain = rma(np.clip(diff, 0, None), period)
+    avg_loss = rma(np.clip(-diff, 0, None), period)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        value = 100 - 100 / (1 + avg_gain / avg_loss)
+    value = np.where(avg_loss == 0, np.where(avg_gain == 0, 50.0, 100.0), value)
+    out[:, 1:] = np.where(np.isnan(avg_gain), np.nan, value)
+    return out
+
+def true_range(high, low, close) -> np.ndarray:
+    h, l, c = _as_2d(high), _as_2d(low), _as_2d(close)
+    prev_close = np.concatenate([c[:, :1], c[:, :-1]], axis=1)
+    return np.maximum(h - l, np.maximum(np.abs(h - prev_close), np.abs(l - prev_close)))
+
+def atr(high, low, close, period: int = 14) -> np.ndarray:
+    return rma(true_range(high, low, close), period)
+
+# ----- 3. SIGNALS -----
+def price_status(close, line) -> np.ndarray:
+    c, l = _as_2d(close), _as_2d(line)
+    return np.where(c[:, -1] > l[:, -1], "ABOVE", "BELOW")
+
+def cross_signal(close, line) -> np.ndarray:
+    # Compares the last two candles of every symbol
+    c, l = _as_2d(close), _as_2d(line)
+    above_now = c[:, -1] > l[:, -1]
+    above_prev = c[:, -2] > l[:, -2]
+    return np.select([~above_prev & above_now, above_prev & ~above_now], ["BULL-CROSS", "BEAR-CROSS"], "NON-CROSS")
+
+def percent_diff(close, line) -> np.ndarray:
+    c, l = _as_2d(close), _as_2d(line)
+    return (c[:, -1] - l[:, -1]) / l[:, -1] * 100
@@ -1,6 +1,10 @@
 # 2026.02.27  18.00
-from fastapi import APIRouter
-import requests
+import asyncio
+from datetime import datetime, timedelta, timezone
+from fastapi import APIRouter, Query, Response
+import httpx
+from apis.snapshot_cache import SnapshotCache, set_snapshot_headers
+from apis.kraken_history import TickerHistory, try_recorder_lock, RECORD_INTERVAL
 
 xstocks_list = [
     'AAPLxUSD', 'ABBVxUSD', 'ABTxUSD', 'ACNxUSD', 'AMBRxUSD', 'AMDxUSD', 'AMZNxUSD', 'APPxUSD', 'AVGOxUSD', 'AZNxUSD',
@@ -10,27 +14,73 @@ xstocks_list = [
     'LINxUSD', 'LLYxUSD', 'MCDxUSD', 'MDTxUSD', 'METAxUSD', 'MRKxUSD', 'MRVLxUSD', 'MSFTxUSD', 'MSTRxUSD', 'NFLXxUSD', 
     'NVDAxUSD', 'NVOxUSD', 'OPENxUSD', 'ORCLxUSD', 'PALLxUSD', 'PEPxUSD', 'PFExUSD', 'PGxUSD', 'PLTRxUSD', 'PMxUSD', 
     'PPLTxUSD', 'QQQxUSD', 'SCHFxUSD', 'SLVxUSD', 'SPYxUSD', 'STRCxUSD', 'TBLLxUSD', 'TMOxUSD', 'TONXxUSD', 'TQQQxUSD',
-    'TSLAxUSD', 'UNHxUSD', 'VxUSD', 'VTIxUSD', 'VTxUSD', 'XOMxUSD','GLDxUSD', 'SLVxUSD', 'PALLxUSD', 'PPLTxUSD', 'COPXxUSD'
+    'TSLAxUSD', 'UNHxUSD', 'VxUSD', 'VTIxUSD', 'VTxUSD', 'XOMxUSD'
 ]
 
 router = APIRouter()
 
-@router.get("/check-stocks")
-def check_stocks():
-    
-    url = "https://api.kraken.com/0/public/Ticker"    
-    params = {"pair": ",".join(xstocks_list), 
-              "asset_class": "tokenized_asset" }
-    
-    try:
-        response = requests.get(url, params=params, timeout=10).json()
-        
-        if response.get("error"):
-            return {"status": "error", "message": response["error"]}
+KRAKEN_TICKER_URL = "https://api.kraken.com/0/public/Ticker"
+CHUNK_SIZE = 20   # pairs per Ticker request, chunks are fetched concurrently
+
+pairs = list(dict.fromkeys(xstocks_list))
+pair_chunks = [pairs[i:i + CHUNK_SIZE] for i in range(0, len(pairs), CHUNK_SIZE)]
+
+# Concurrent /check-stocks callers share one Kraken pass; errors fall back to the last good table
+snapshots = SnapshotCache(ttl=15, max_stale=120)
+
+# One keep-alive pool per worker, created on first use
+client = None
+
+def get_client() -> httpx.AsyncClient:
+    global client
+    if client is None:
+        client = httpx.AsyncClient(timeout=10, limits=httpx.Limits(max_connections=10, max_keepalive_connections=10, keepalive_expiry=60))
+    return client
+
+# Ticker history: one worker per host records a snapshot every RECORD_INTERVAL
+history = TickerHistory()
+recorder_task = None
+
+async def recorder_loop():
+    lock = await asyncio.to_thread(try_recorder_lock)
+    while lock is None:
+        await asyncio.sleep(RECORD_INTERVAL)
+        lock = await asyncio.to_thread(try_recorder_lock)
+
+    while True:
+        try:
+            history.append(await snapshots.refresh("check-stocks", fetch_stocks))
+        except Exception as e:
+            print(f"Kraken history snapshot failed: {e}")
+        if history.flush_due():
+            await asyncio.to_thread(history.flush)
+        await asyncio.sleep(RECORD_INTERVAL)
 
-        data = response["result"]
-        results = []
+@router.on_event("startup")
+async def startup_event():
+    global recorder_task
+    recorder_task = asyncio.create_task(recorder_loop())
 
+@router.on_event("shutdown")
+async def shutdown_event():
+    if recorder_task is not None:
+        recorder_task.cancel()
+    await asyncio.to_thread(history.flush)
+    if client is not None:
+        await client.aclose()
+
+async def fetch_chunk(chunk: list) -> dict:
+    params = {"pair": ",".join(chunk), "asset_class": "tokenized_asset"}
+    response = (await get_client().get(KRAKEN_TICKER_URL, params=params)).json()
+    if response.get("error"):
+        raise RuntimeError(response["error"])
+    return response["result"]
+
+async def fetch_stocks() -> list:
+    chunks = await asyncio.gather(*[fetch_chunk(c) for c in pair_chunks])
+    results = []
+
+    for data in chunks:
         for pair_name, info in data.items():
             current_price = float(info["c"][0])
             volume = float(info["v"][0])
@@ -43,8 +93,32 @@ def check_stocks():
                 "trade_count": trade_count
             })
 
+    return results
+
+@router.get("/check-stocks")
+async def check_stocks(response: Response):
+    try:
+        results, meta = await snapshots.get("check-stocks", fetch_stocks)
+        set_snapshot_headers(response, meta)
         return results
         
     except Exception as e:
-        return {"status": "error", "message": str(e)}
+        message = e.args[0] if isinstance(e, RuntimeError) and e.args else str(e)
+        return {"status": "error", "message": message}
+
+@router.get("/history")
+async def ticker_history(start: datetime | None = None, end: datetime | None = None,
+    tickers: str | None = Query(None, description="Comma-separated, e.g. AAPLxUSD,NVDAxUSD"),
+    columns: str | None = Query(None, description="Comma-separated subset of price,volume,trade_count")):
+
+    # Naive datetimes are treated as UTC; default window is the last 24h
+    end = end or datetime.now(timezone.utc)
+    end = end if end.tzinfo else end.replace(tzinfo=timezone.utc)
+    start = start or end - timedelta(days=1)
+    start = start if start.tzinfo else start.replace(tzinfo=timezone.utc)
+
+    ticker_list = [t.strip() for t in tickers.split(",") if t.strip()] if tickers else None
+    column_list = [c.strip() for c in columns.split(",") if c.strip()] if columns else None
 
+    table = await asyncio.to_thread(history.query, start, end, ticker_list, column_list)
+    return table.to_pylist()
@@ -0,0 +1,100 @@
+# 2026.10.18  17.00
+import fcntl
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+# ----- 1. CONFIGURATION -----
+HISTORY_DIR = Path(os.getenv("KRAKEN_HISTORY_DIR", "data/kraken_history"))
+RECORD_INTERVAL = int(os.getenv("KRAKEN_HISTORY_INTERVAL", "60"))   # seconds between recorded snapshots
+FLUSH_INTERVAL = 300                                                # seconds a batch is buffered before it is written
+FLUSH_ROWS = 20000
+
+SCHEMA = pa.schema([
+    ("ts", pa.timestamp("ms", tz="UTC")),
+    ("ticker", pa.string()),
+    ("price", pa.float64()),
+    ("volume", pa.float64()),
+    ("trade_count", pa.float64()),
+])
+VALUE_COLUMNS = ["price", "volume", "trade_count"]
+
+# Hive layout: <HISTORY_DIR>/date=YYYY-MM-DD/part-*.parquet
+PARTITIONING = ds.partitioning(pa.schema([("date", pa.string())]), flavor="hive")
+
+
+# ----- 2. BATCHED APPENDS -----
+class TickerHistory:
+    def __init__(self, root: Path = HISTORY_DIR):
+        self.root = root
+        self.buffer = {name: [] for name in SCHEMA.names}
+        self.buffered_since = None
+        self.lock = threading.Lock()
+
+    def append(self, rows: list, ts: datetime = None):
+        ts = ts or datetime.now(timezone.utc)
+        with self.lock:
+            for row in rows:
+                self.buffer["ts"].append(ts)
+                for name in SCHEMA.names[1:]:
+                    self.buffer[name].append(row.get(name))
+            if self.buffered_since is None:
+                self.buffered_since = time.monotonic()
+
+    def flush_due(self) -> bool:
+        return self.buffered_since is not None and (
+            time.monotonic() - self.buffered_since >= FLUSH_INTERVAL or len(self.buffer["ts"]) >= FLUSH_ROWS)
+
+    def flush(self):
+        with self.lock:
+            if not self.buffer["ts"]:
+                return
+            table = pa.table(self.buffer, schema=SCHEMA)
+            self.buffer = {name: [] for name in SCHEMA.names}
+            self.buffered_since = None
+
+        # One file per day touched by this batch
+        days = pc.strftime(table["ts"], format="%Y-%m-%d")
+        for day in pc.unique(days).to_pylist():
+            part_dir = self.root / f"date={day}"
+            part_dir.mkdir(parents=True, exist_ok=True)
+            name = f"part-{os.getpid()}-{time.time_ns()}.parquet"
+            tmp = part_dir / f".{name}.tmp"   # dot-prefixed files are skipped by dataset discovery
+            pq.write_table(table.filter(pc.equal(days, day)), tmp, compression="zstd")
+            os.replace(tmp, part_dir / name)
+
+    # ----- 3. RANGE QUERIES -----
+    def query(self, start: datetime, end: datetime, tickers: list = None, columns: list = None) -> pa.Table:
+        start, end = start.astimezone(timezone.utc), end.astimezone(timezone.utc)
+        columns = ["ts", "ticker"] + [c for c in (columns or VALUE_COLUMNS) if c in VALUE_COLUMNS]
+        if not self.root.exists():
+            return SCHEMA.empty_table().select(columns)
+
+        dataset = ds.dataset(self.root, format="parquet", partitioning=PARTITIONING)
+
+        # date prunes whole directories, ts/ticker are pushed down to row groups
+        expr = (ds.field("date") >= f"{start:%Y-%m-%d}") & (ds.field("date") <= f"{end:%Y-%m-%d}")
+        expr &= (ds.field("ts") >= pa.scalar(start, SCHEMA.field("ts").type)) & (ds.field("ts") < pa.scalar(end, SCHEMA.field("ts").type))
+        if tickers:
+            expr &= ds.field("ticker").isin(tickers)
+
+        return dataset.to_table(columns=columns, filter=expr).sort_by([("ticker", "ascending"), ("ts", "ascending")])
+
+
+# ----- 4. SINGLE RECORDER PER HOST -----
+def try_recorder_lock(root: Path = HISTORY_DIR):
+    # flock is released automatically when the holding worker exits
+    root.mkdir(parents=True, exist_ok=True)
+    handle = open(root / ".recorder.lock", "w")
+    try:
+        fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return handle
+    except OSError:
+        handle.close()
+        return None
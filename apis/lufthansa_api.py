@@ -1,14 +1,22 @@
 # 2026.02.23  12.00
 import os
+import io
+import json
+import time
+from datetime import date, datetime, timezone
 import httpx
 import asyncio
-import pandas as pd
-import requests
-from fastapi.responses import StreamingResponse, FileResponse
-import io
-from fastapi import APIRouter
+import pyarrow as pa
+from fastapi.responses import StreamingResponse, FileResponse, JSONResponse
+from fastapi import APIRouter, Request, Response
 from sqlalchemy import create_engine
 from pathlib import Path
+from apis.lufthansa_flatten import SCHEMA as FLIGHT_SCHEMA, FlightColumns
+from apis.lufthansa_route_cache import RouteCache
+from apis.lufthansa_store import upsert_flights
+from apis.lufthansa_export import DEFAULT_COLUMNS, EXPORT_COLUMNS, build_query, cached_export, data_version, export_key, stream_export
+from apis import lufthansa_backfill as backfill
+from apis.rate_limiter import RateLimiter, TokenBucket, parse_retry_after, backoff_delay
 import tempfile
 
 router = APIRouter()
@@ -36,126 +44,319 @@ sql_engine = create_engine(
 
 router = APIRouter()
 
-def get_lufthansa_token():
-    CLIENT_ID = os.getenv("LH_CLIENT_ID")
-    CLIENT_SECRET = os.getenv("LH_CLIENT_SECRET")
-    token_url = "https://api.lufthansa.com/v1/oauth/token"
-    payload = {"grant_type": "client_credentials", "client_id": CLIENT_ID, "client_secret": CLIENT_SECRET}
-    resp = requests.post(token_url, data=payload)
-    resp.raise_for_status()
-    return resp.json()["access_token"]
-
-async def fetch_route(client, token, origin, dest, flight_date, sem):
-    url = f"https://api.lufthansa.com/v1/operations/customerflightinformation/route/{origin}/{dest}/{flight_date}"
-    headers = {"Authorization": f"Bearer {token}", "Accept": "application/json"}
-    async with sem:
+LH_API_BASE = os.getenv("LH_API_BASE", "https://api.lufthansa.com/v1")   # point at a mock server for benchmarks
+LH_TOKEN_URL = f"{LH_API_BASE}/oauth/token"
+
+# API quota (public plan: 5 calls/s, 1000 calls/h) for the whole app, not per worker:
+# the gunicorn workers share one bucket state file. Empty LH_RATE_STATE = per-process limiter.
+LH_RATE_PER_SEC = float(os.getenv("LH_RATE_PER_SEC", "5"))
+LH_RATE_BURST = float(os.getenv("LH_RATE_BURST", "5"))
+LH_RATE_PER_HOUR = float(os.getenv("LH_RATE_PER_HOUR", "1000"))
+LH_RATE_STATE = os.getenv("LH_RATE_STATE", "data/lufthansa_rate_limit.json")
+LH_MAX_RETRIES = 4
+
+ROUTES_FULL = [
+# FRA Routes - Long Haul
+("FRA", "SIN"), ("FRA", "HND"), ("FRA", "LAX"), ("FRA", "JFK"), ("FRA", "EWR"), ("FRA", "ORD"), ("FRA", "IAD"), ("FRA", "BOS"), ("FRA", "DEN"), ("FRA", "SFO"),
+("FRA", "MIA"), ("FRA", "YYZ"), ("FRA", "MEX"), ("FRA", "DEL"), ("FRA", "BOM"), ("FRA", "BLR"), ("FRA", "HYD"), ("FRA", "ICN"), ("FRA", "GRU"), ("FRA", "DXB"),
+("FRA", "CAI"), ("FRA", "TLV"), ("FRA", "BEY"), 
+# FRA Routes - European
+("FRA", "LHR"), ("FRA", "LCY"), ("FRA", "CDG"), ("FRA", "AMS"), ("FRA", "MAD"), ("FRA", "BCN"), ("FRA", "LIS"), ("FRA", "ATH"), ("FRA", "IST"), ("FRA", "BER"),
+("FRA", "HAM"), ("FRA", "DUS"), ("FRA", "MUC"), ("FRA", "VIE"), ("FRA", "ZRH"), ("FRA", "CPH"), ("FRA", "OSL"), ("FRA", "HEL"), ("FRA", "WAW"), ("FRA", "PRG"),
+("FRA", "BUD"), ("FRA", "MXP"), ("FRA", "TLS"), ("FRA", "MAN"), ("FRA", "DUB"),
+# MUC Routes - Long Haul
+("MUC", "LAX"), ("MUC", "SFO"), ("MUC", "DEN"), ("MUC", "ORD"), ("MUC", "EWR"), ("MUC", "JFK"), ("MUC", "BOS"), ("MUC", "DEL"), ("MUC", "BOM"), ("MUC", "BLR"),
+("MUC", "BKK"), ("MUC", "JNB"), ("MUC", "CPT"), ("MUC", "DXB"),
+# MUC Routes - European
+("MUC", "LHR"), ("MUC", "CDG"), ("MUC", "AMS"), ("MUC", "MAD"), ("MUC", "BCN"), ("MUC", "LIS"), ("MUC", "ATH"), ("MUC", "BER"), ("MUC", "HAM"), ("MUC", "DUS"),
+("MUC", "FRA"), ("MUC", "VIE"), ("MUC", "ZRH"), ("MUC", "CPH"), ("MUC", "OSL"), ("MUC", "WAW"), ("MUC", "PRG"), ("MUC", "BUD"), ("MUC", "FCO"), ("MUC", "MXP"),
+("MUC", "MAN"), ("MUC", "DUB"), ("MUC", "TLV"),
+]
+
+
+# Cached OAuth token, refreshed once (under the lock) shortly before expires_in
+class LufthansaTokenManager:
+    def __init__(self, token_url: str = LH_TOKEN_URL, refresh_margin: int = 60):
+        self.token_url = token_url
+        self.refresh_margin = refresh_margin
+        self.token = None
+        self.expires_at = 0.0
+        self.lock = asyncio.Lock()
+
+    def _valid(self) -> bool:
+        return self.token is not None and time.monotonic() < self.expires_at
+
+    async def get(self, client: httpx.AsyncClient) -> str:
+        if self._valid():
+            return self.token
+
+        async with self.lock:
+            if self._valid():   # another request refreshed it while we waited
+                return self.token
+
+            payload = {"grant_type": "client_credentials", "client_id": os.getenv("LH_CLIENT_ID"), "client_secret": os.getenv("LH_CLIENT_SECRET")}
+            resp = await client.post(self.token_url, data=payload, timeout=10)
+            resp.raise_for_status()
+            body = resp.json()
+
+            self.token = body["access_token"]
+            self.expires_at = time.monotonic() + max(0, int(body.get("expires_in", 0)) - self.refresh_margin)
+            return self.token
+
+    def invalidate(self, token: str):
+        # Only drop the token that was rejected, not one a concurrent refresh just fetched
+        if self.token == token:
+            self.token = None
+
+lh_tokens = LufthansaTokenManager()
+
+lh_limiter = RateLimiter(TokenBucket(LH_RATE_PER_SEC, LH_RATE_BURST), TokenBucket(LH_RATE_PER_HOUR / 3600, LH_RATE_PER_HOUR),
+                         state_path=Path(LH_RATE_STATE) if LH_RATE_STATE else None)
+
+route_cache = RouteCache()
+
+backfill_tasks = {}   # job_id -> asyncio.Task running in this worker
+RESUME_INTERVAL = 300  # seconds between scans for orphaned backfill jobs
+
+async def fetch_route(client, tokens, limiter, origin, dest, flight_date):
+    # Returns (flights | None, error | None); a 404 means no flights on that route/date
+    url = f"{LH_API_BASE}/operations/customerflightinformation/route/{origin}/{dest}/{flight_date}"
+    error, auth_retried, attempt = None, False, 0
+
+    while attempt <= LH_MAX_RETRIES:
+        await limiter.acquire()
         try:
+            token = await tokens.get(client)
+            headers = {"Authorization": f"Bearer {token}", "Accept": "application/json"}
             resp = await client.get(url, headers=headers, timeout=10)
-            await asyncio.sleep(0.5)
-            if resp.status_code != 200: return None
-            
+        except httpx.HTTPError as e:
+            error = type(e).__name__
+            await asyncio.sleep(backoff_delay(attempt))
+            attempt += 1
+            continue
+
+        if resp.status_code == 401 and not auth_retried:
+            auth_retried = True
+            tokens.invalidate(token)   # expired/revoked early: refresh and retry once
+            continue
+
+        if resp.status_code == 429 or resp.status_code >= 500:
+            error = f"HTTP {resp.status_code}"
+            retry_after = parse_retry_after(resp.headers.get("Retry-After"))
+            if resp.status_code == 429 and retry_after is not None:
+                limiter.pause(retry_after)
+            else:
+                await asyncio.sleep(backoff_delay(attempt))
+            attempt += 1
+            continue
+
+        if resp.status_code == 404: return None, None
+        if resp.status_code != 200: return None, f"HTTP {resp.status_code}"
+
+        try:
             json_data = resp.json()
             flights = json_data.get("FlightInformation", {}).get("Flights", {}).get("Flight", [])
-            if not flights: return None
+        except Exception as e:
+            return None, f"Invalid response: {e}"
+        if not flights: return None, None
+
+        return flights, None
 
-            df = pd.json_normalize(flights)
-            df["route_key"] = f"{origin}-{dest}"
-            return df
-        except Exception:
-            return None
+    return None, error
+
+async def fetch_route_cached(client, tokens, limiter, origin, dest, flight_date):
+    # Only cache misses reach the API (and the rate limiter); failures are never cached
+    flights = await asyncio.to_thread(route_cache.get, origin, dest, flight_date)
+    if flights is not None:
+        return flights, None
+
+    flights, error = await fetch_route(client, tokens, limiter, origin, dest, flight_date)
+    if error is None:
+        await asyncio.to_thread(route_cache.put, origin, dest, flight_date, flights)
+    return flights, error
 
 @router.get("/lh_flights/parquet")
-async def get_flightroute_parquet():
-    with sql_engine.connect() as conn:
-        query = """SELECT id, route_key, departure_airport_code, departure_terminal_gate, departure_status_code, arrival_airport_code, 
-        arrival_terminal_gate, arrival_status_code, operatingcarrier_airlineid, operatingcarrier_flightnumber, equipment_aircraftcode FROM lufthansa ORDER BY id DESC"""
-        df = pd.read_sql(query, conn)
-
-    # Create parquet in memory (no file on disk)
-    buffer = io.BytesIO()
-    df.to_parquet(buffer, engine="pyarrow", index=False) 
-    buffer.seek(0)  # Reset position 
-    return StreamingResponse(buffer, media_type="application/octet-stream", headers={"Content-Disposition": "attachment; filename=lufthansa.parquet"})
-
-    # Save to temp directory
-    #local_file = "/tmp/lufthansa.parquet"
-    #df.to_parquet(local_file, engine="pyarrow", index=False)
-    #return FileResponse(path=local_file, media_type="application/octet-stream", filename="lufthansa.parquet")
-    
-    # Save to static/public directory, Must be served by your web server
-    #static_dir = Path("/app/static_files") 
-    #static_dir.mkdir(exist_ok=True)   
-    #local_file = static_dir / "lufthansa.parquet"
-    #df.to_parquet(local_file, engine="pyarrow", index=False)  # Returns None - we don't use the return value    
-    #return { "status": "success", "file_url": "https://dash.petrosofteu.cloud/static_files/lufthansa.parquet", "rows": len(df) }
+async def get_flightroute_parquet(request: Request, columns: str = None, date_from: str = None, date_to: str = None, routes: str = None):
+    # columns / routes are comma separated; dates filter departure_scheduled_date (YYYY-MM-DD, inclusive)
+    selected = [c.strip() for c in columns.split(",")] if columns else DEFAULT_COLUMNS
+    unknown = [c for c in selected if c not in EXPORT_COLUMNS]
+    if unknown:
+        return JSONResponse({"error": f"Unknown columns: {', '.join(unknown)}"}, status_code=400)
+    route_list = [r.strip() for r in routes.split(",")] if routes else None
+
+    version = await asyncio.to_thread(data_version, sql_engine)
+    key = export_key(version, selected, date_from, date_to, route_list)
+    headers = {"ETag": f'"{key}"', "Content-Disposition": "attachment; filename=lufthansa.parquet"}
+
+    if request.headers.get("if-none-match") == headers["ETag"]:
+        return Response(status_code=304, headers={"ETag": headers["ETag"]})
+
+    cached = cached_export(key)
+    if cached:
+        return FileResponse(cached, media_type="application/octet-stream", headers=headers)
+
+    sql, params = build_query(selected, date_from, date_to, route_list)
+    return StreamingResponse(stream_export(sql_engine, key, selected, sql, params), media_type="application/octet-stream", headers=headers)
+
+STREAM_FORMATS = {"ndjson": "application/x-ndjson", "arrow": "application/vnd.apache.arrow.stream"}
+
+async def sweep_routes(client, flight_date, ingested_at, failed: list):
+    # Yields one Arrow table per route as results complete (completion order, not ROUTES_FULL order)
+    async def fetch_one(origin, dest):
+        flights, error = await fetch_route_cached(client, lh_tokens, lh_limiter, origin, dest, flight_date)
+        return f"{origin}-{dest}", flights, error
+
+    tasks = [asyncio.ensure_future(fetch_one(o, d)) for o, d in ROUTES_FULL]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            route_key, flights, error = await next_done
+            if error:
+                failed.append(route_key)
+            elif flights:
+                batch = FlightColumns()
+                batch.extend(flights, route_key)
+                yield batch.to_table(ingested_at)
+    finally:
+        for task in tasks:
+            task.cancel()   # client went away mid-stream
+
+async def store_sweep(flight_date, tables: list, failed: list):
+    # Returns the number of changed rows, or None if the upsert failed
+    if failed:
+        print(f"Lufthansa {flight_date}: {len(failed)} routes failed: {', '.join(failed)}")
+    try:
+        return await asyncio.to_thread(upsert_flights, sql_engine, pa.concat_tables(tables)) if tables else 0
+    except Exception as e:
+        print(f"Lufthansa {flight_date}: upsert failed: {e}")
+        return None
+
+async def stream_sweep(client, flight_date, fmt, persist):
+    ingested_at = datetime.now(timezone.utc).isoformat()
+    failed, tables = [], []
+    sink = io.BytesIO()
+    writer = pa.ipc.new_stream(sink, FLIGHT_SCHEMA) if fmt == "arrow" else None
+
+    try:
+        async for table in sweep_routes(client, flight_date, ingested_at, failed):
+            if persist:
+                tables.append(table)
+            if writer is None:
+                yield "".join(json.dumps(row) + "\n" for row in table.to_pylist()).encode()
+                continue
+            writer.write_table(table)
+            yield sink.getvalue()
+            sink.seek(0)
+            sink.truncate()
+        if writer is not None:
+            writer.close()
+            yield sink.getvalue()
+    finally:
+        await client.aclose()
+
+    # Streams can't carry X-Failed-Routes once the body has started; failures are logged
+    await store_sweep(flight_date, tables if persist else [], failed)
 
 @router.get("/lh_flights/{flight_date}")
-async def get_flightroute_details(flight_date: str):
-    token = get_lufthansa_token()
-    
-    ROUTES_FULL = [
-    # FRA Routes - Long Haul
-    ("FRA", "SIN"), ("FRA", "HND"), ("FRA", "LAX"), ("FRA", "JFK"), ("FRA", "EWR"), ("FRA", "ORD"), ("FRA", "IAD"), ("FRA", "BOS"), ("FRA", "DEN"), ("FRA", "SFO"),
-    ("FRA", "MIA"), ("FRA", "YYZ"), ("FRA", "MEX"), ("FRA", "DEL"), ("FRA", "BOM"), ("FRA", "BLR"), ("FRA", "HYD"), ("FRA", "ICN"), ("FRA", "GRU"), ("FRA", "DXB"),
-    ("FRA", "CAI"), ("FRA", "TLV"), ("FRA", "BEY"), 
-    # FRA Routes - European
-    ("FRA", "LHR"), ("FRA", "LCY"), ("FRA", "CDG"), ("FRA", "AMS"), ("FRA", "MAD"), ("FRA", "BCN"), ("FRA", "LIS"), ("FRA", "ATH"), ("FRA", "IST"), ("FRA", "BER"),
-    ("FRA", "HAM"), ("FRA", "DUS"), ("FRA", "MUC"), ("FRA", "VIE"), ("FRA", "ZRH"), ("FRA", "CPH"), ("FRA", "OSL"), ("FRA", "HEL"), ("FRA", "WAW"), ("FRA", "PRG"),
-    ("FRA", "BUD"), ("FRA", "MXP"), ("FRA", "TLS"), ("FRA", "MAN"), ("FRA", "DUB"),
-    # MUC Routes - Long Haul
-    ("MUC", "LAX"), ("MUC", "SFO"), ("MUC", "DEN"), ("MUC", "ORD"), ("MUC", "EWR"), ("MUC", "JFK"), ("MUC", "BOS"), ("MUC", "DEL"), ("MUC", "BOM"), ("MUC", "BLR"),
-    ("MUC", "BKK"), ("MUC", "JNB"), ("MUC", "CPT"), ("MUC", "DXB"),
-    # MUC Routes - European
-    ("MUC", "LHR"), ("MUC", "CDG"), ("MUC", "AMS"), ("MUC", "MAD"), ("MUC", "BCN"), ("MUC", "LIS"), ("MUC", "ATH"), ("MUC", "BER"), ("MUC", "HAM"), ("MUC", "DUS"),
-    ("MUC", "FRA"), ("MUC", "VIE"), ("MUC", "ZRH"), ("MUC", "CPH"), ("MUC", "OSL"), ("MUC", "WAW"), ("MUC", "PRG"), ("MUC", "BUD"), ("MUC", "FCO"), ("MUC", "MXP"),
-    ("MUC", "MAN"), ("MUC", "DUB"), ("MUC", "TLV"),
-    ]   
-    
-    sem = asyncio.Semaphore(4)
-    async with httpx.AsyncClient(timeout=60) as client:
-        tasks = [fetch_route(client, token, o, d, flight_date, sem) for o, d in ROUTES_FULL]
-        results = await asyncio.gather(*tasks)
-
-    all_dataframes = [df for df in results if df is not None]
-    if not all_dataframes: return []
-        
-    combined_df = pd.concat(all_dataframes, ignore_index=True)
-    combined_df.columns = [c.replace('.', '_') for c in combined_df.columns]
-
-    combined_df = combined_df.drop(columns=[
-            "Departure_Terminal_Name", "Arrival_Terminal_Name", 
-            "Departure_Status_Description", "Arrival_Status_Description", "Status_Description",
-            "MarketingCarrierList_MarketingCarrier_AirlineID",
-            "MarketingCarrierList_MarketingCarrier_FlightNumber",
-            "MarketingCarrierList_MarketingCarrier",
-    ], errors="ignore")
-        
-    combined_df["ingested_at"] = pd.Timestamp.now().isoformat()
-    combined_df = combined_df.where(pd.notnull(combined_df), None)
-
-    rename_map = {
-            "Departure_AirportCode": "departure_airport_code",
-            "Departure_Scheduled_Date": "departure_scheduled_date",
-            "Departure_Scheduled_Time": "departure_scheduled_time",
-            "Departure_Actual_Date": "departure_actual_date",
-            "Departure_Actual_Time": "departure_actual_time",
-            "Departure_Terminal_Gate": "departure_terminal_gate",
-            "Departure_Status_Code": "departure_status_code",
-            "Arrival_AirportCode": "arrival_airport_code",
-            "Arrival_Scheduled_Date": "arrival_scheduled_date",
-            "Arrival_Scheduled_Time": "arrival_scheduled_time",
-            "Arrival_Actual_Date": "arrival_actual_date",
-            "Arrival_Actual_Time": "arrival_actual_time",
-            "Arrival_Terminal_Gate": "arrival_terminal_gate",
-            "Arrival_Status_Code": "arrival_status_code",
-            "OperatingCarrier_AirlineID": "operatingcarrier_airlineid",
-            "OperatingCarrier_FlightNumber": "operatingcarrier_flightnumber",
-            "Equipment_AircraftCode": "equipment_aircraftcode",
-            "Status_Code": "status_code",
-            "route_key": "route_key",
-            "ingested_at": "ingested_at",
-    }
+async def get_flightroute_details(flight_date: str, persist: bool = True, format: str = "json"):
+    # format: json (one array, default) | ndjson | arrow (IPC stream); streams emit each route as it completes
+    if format != "json" and format not in STREAM_FORMATS:
+        return JSONResponse({"error": f"Unknown format: {format}"}, status_code=400)
+
+    client = httpx.AsyncClient(timeout=60)
+    try:
+        await lh_tokens.get(client)   # auth errors surface here instead of as empty routes
+    except Exception:
+        await client.aclose()
+        raise
+
+    if format in STREAM_FORMATS:
+        return StreamingResponse(stream_sweep(client, flight_date, format, persist), media_type=STREAM_FORMATS[format])
+
+    failed = []
+    try:
+        tables = [t async for t in sweep_routes(client, flight_date, datetime.now(timezone.utc).isoformat(), failed)]
+    finally:
+        await client.aclose()
+
+    # The single array keeps ROUTES_FULL order, as before streaming; only ndjson/arrow are completion order
+    order = {f"{o}-{d}": i for i, (o, d) in enumerate(ROUTES_FULL)}
+    tables.sort(key=lambda t: order[t.column("route_key")[0].as_py()])
+    failed.sort(key=order.get)
+
+    headers = {}
+    if failed:
+        headers["X-Failed-Routes"] = ",".join(failed)
+    if persist:
+        changed = await store_sweep(flight_date, tables, failed)
+        if changed is not None:
+            headers["X-Rows-Changed"] = str(changed)
+    elif failed:
+        print(f"Lufthansa {flight_date}: {len(failed)} routes failed: {', '.join(failed)}")
+
+    # JSONResponse directly: skips FastAPI's generic encoder for plain str/None rows
+    return JSONResponse(pa.concat_tables(tables).to_pylist() if tables else [], headers=headers)
+
+
+# ----- BACKFILL JOBS -----
+async def fetch_backfill_cell(client, origin, dest, flight_date):
+    return await fetch_route_cached(client, lh_tokens, lh_limiter, origin, dest, flight_date)
+
+def start_backfill(job_id: int):
+    task = backfill_tasks.get(job_id)
+    if task is None or task.done():
+        task = asyncio.create_task(backfill.run_job(sql_engine, job_id, fetch_backfill_cell))
+        backfill_tasks[job_id] = task
+        task.add_done_callback(lambda _: backfill_tasks.pop(job_id, None))
+
+async def backfill_resume_loop():
+    # Picks up jobs left queued/running by a worker that exited; the job lock keeps it to one runner
+    while True:
+        try:
+            for job_id in await asyncio.to_thread(backfill.resumable_jobs, sql_engine):
+                start_backfill(job_id)
+        except Exception as e:
+            print(f"Backfill resume scan failed: {e}")
+        await asyncio.sleep(RESUME_INTERVAL)
+
+@router.on_event("startup")
+async def startup_event():
+    global resume_task
+    resume_task = asyncio.create_task(backfill_resume_loop())
+
+@router.on_event("shutdown")
+async def shutdown_event():
+    resume_task.cancel()
+    for task in list(backfill_tasks.values()):
+        task.cancel()
+
+@router.post("/lh_backfill")
+async def create_backfill(date_from: str, date_to: str):
+    try:
+        start, end = date.fromisoformat(date_from), date.fromisoformat(date_to)
+    except ValueError:
+        return JSONResponse({"error": "Dates must be YYYY-MM-DD"}, status_code=400)
+    days = (end - start).days + 1
+    if days < 1 or days > backfill.BACKFILL_MAX_DAYS:
+        return JSONResponse({"error": f"Range must cover 1-{backfill.BACKFILL_MAX_DAYS} days"}, status_code=400)
+
+    routes = [f"{o}-{d}" for o, d in ROUTES_FULL]
+    job_id = await asyncio.to_thread(backfill.create_job, sql_engine, start, end, routes)
+    start_backfill(job_id)
+    return {"job_id": job_id, "status": "queued", "cells": days * len(routes)}
+
+@router.get("/lh_backfill/{job_id}")
+async def get_backfill(job_id: int):
+    status = await asyncio.to_thread(backfill.job_status, sql_engine, job_id)
+    if status is None:
+        return JSONResponse({"error": "Unknown job"}, status_code=404)
+    status["running_here"] = job_id in backfill_tasks
+    return status
 
-    combined_df = combined_df.rename(columns=rename_map)
-            
-    return combined_df.to_dict(orient="records")
+@router.post("/lh_backfill/{job_id}/resume")
+async def resume_backfill(job_id: int):
+    # Re-runs every cell not yet done (failed ones included)
+    status = await asyncio.to_thread(backfill.job_status, sql_engine, job_id)
+    if status is None:
+        return JSONResponse({"error": "Unknown job"}, status_code=404)
+    start_backfill(job_id)
+    return {"job_id": job_id, "status": "resuming", "cells_pending": status["cells_total"] - status["cells_done"]}
@@ -0,0 +1,203 @@
+# 2026.10.18  22.00
+import asyncio
+import os
+from datetime import date, datetime, timedelta, timezone
+import httpx
+from sqlalchemy import text
+from apis.advisory_lock import release_advisory_lock, try_advisory_lock
+from apis.lufthansa_flatten import FlightColumns
+from apis.lufthansa_store import copy_upsert, ensure_schema
+
+# =========================
+# CONFIG
+# =========================
+BACKFILL_LOCK_KEY = 7301003                                             # pg_try_advisory_lock(key, job_id): one runner per job
+BACKFILL_CONCURRENCY = int(os.getenv("LH_BACKFILL_CONCURRENCY", "16"))  # cells in flight; the rate limiter sets the pace
+BACKFILL_MAX_DAYS = int(os.getenv("LH_BACKFILL_MAX_DAYS", "92"))
+CHECKPOINT_CELLS = 25                                                   # cells per upsert + checkpoint transaction
+schema_ready = False                                                    # per process; DDL runs on the first job
+
+# =========================
+# DDL
+# =========================
+CREATE_JOBS = """
+    CREATE TABLE IF NOT EXISTS lh_backfill_jobs (
+        id          SERIAL PRIMARY KEY,
+        date_from   DATE NOT NULL,
+        date_to     DATE NOT NULL,
+        routes      TEXT[] NOT NULL,
+        status      TEXT NOT NULL,
+        created_at  TIMESTAMPTZ NOT NULL DEFAULT now(),
+        updated_at  TIMESTAMPTZ NOT NULL DEFAULT now()
+    )
+"""
+
+# One checkpoint per (route, date) cell; 'done' cells are never refetched
+CREATE_CELLS = """
+    CREATE TABLE IF NOT EXISTS lh_backfill_cells (
+        job_id      INTEGER NOT NULL REFERENCES lh_backfill_jobs (id) ON DELETE CASCADE,
+        route_key   TEXT NOT NULL,
+        flight_date DATE NOT NULL,
+        status      TEXT NOT NULL,
+        rows        INTEGER NOT NULL DEFAULT 0,
+        attempts    INTEGER NOT NULL DEFAULT 1,
+        error       TEXT,
+        updated_at  TIMESTAMPTZ NOT NULL DEFAULT now(),
+        PRIMARY KEY (job_id, route_key, flight_date)
+    )
+"""
+
+SAVE_CELLS = text("""
+    INSERT INTO lh_backfill_cells (job_id, route_key, flight_date, status, rows, error)
+    VALUES (:job_id, :route_key, :flight_date, :status, :rows, :error)
+    ON CONFLICT (job_id, route_key, flight_date) DO UPDATE SET
+        status = EXCLUDED.status, rows = EXCLUDED.rows, error = EXCLUDED.error,
+        attempts = lh_backfill_cells.attempts + 1, updated_at = now()
+""")
+
+def ensure_backfill_schema(engine):
+    global schema_ready
+    if schema_ready:
+        return
+    with engine.begin() as conn:
+        ensure_schema(conn)
+        conn.execute(text(CREATE_JOBS))
+        conn.execute(text(CREATE_CELLS))
+    schema_ready = True
+
+def date_range(date_from: date, date_to: date) -> list:
+    return [date_from + timedelta(days=i) for i in range((date_to - date_from).days + 1)]
+
+# =========================
+# JOBS
+# =========================
+def create_job(engine, date_from: date, date_to: date, routes: list) -> int:
+    ensure_backfill_schema(engine)
+    with engine.begin() as conn:
+        return conn.execute(text("""
+            INSERT INTO lh_backfill_jobs (date_from, date_to, routes, status)
+            VALUES (:date_from, :date_to, :routes, 'queued') RETURNING id
+        """), {"date_from": date_from, "date_to": date_to, "routes": routes}).scalar()
+
+def set_job_status(engine, job_id: int, status: str):
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE lh_backfill_jobs SET status = :status, updated_at = now() WHERE id = :id"), {"status": status, "id": job_id})
+
+def resumable_jobs(engine) -> list:
+    # queued/running jobs whose runner died with its worker (the advisory lock went with it).
+    # Periodic, so read-only: no DDL locks; no jobs table yet means no jobs
+    with engine.connect() as conn:
+        if not conn.execute(text("SELECT to_regclass('lh_backfill_jobs') IS NOT NULL")).scalar():
+            return []
+        return conn.execute(text("SELECT id FROM lh_backfill_jobs WHERE status IN ('queued', 'running') ORDER BY id")).scalars().all()
+
+def job_status(engine, job_id: int):
+    with engine.connect() as conn:
+        job = conn.execute(text("SELECT * FROM lh_backfill_jobs WHERE id = :id"), {"id": job_id}).mappings().first()
+        if job is None:
+            return None
+        counts = conn.execute(text("""
+            SELECT status, count(*), COALESCE(sum(rows), 0) FROM lh_backfill_cells WHERE job_id = :id GROUP BY status
+        """), {"id": job_id}).all()
+        failed = conn.execute(text("""
+            SELECT route_key, flight_date, attempts, error FROM lh_backfill_cells
+            WHERE job_id = :id AND status = 'failed' ORDER BY flight_date, route_key LIMIT 50
+        """), {"id": job_id}).mappings().all()
+
+    total = len(job["routes"]) * ((job["date_to"] - job["date_from"]).days + 1)
+    cells = {status: n for status, n, _ in counts}
+    return {
+        "job_id": job["id"],
+        "status": job["status"],
+        "date_from": str(job["date_from"]),
+        "date_to": str(job["date_to"]),
+        "cells_total": total,
+        "cells_done": cells.get("done", 0),
+        "cells_failed": cells.get("failed", 0),
+        "progress_pct": round(100 * cells.get("done", 0) / total, 1) if total else 100.0,
+        "flights": sum(rows for _, _, rows in counts),
+        "created_at": job["created_at"].isoformat(),
+        "updated_at": job["updated_at"].isoformat(),
+        "failed": [{**f, "flight_date": str(f["flight_date"])} for f in failed],
+    }
+
+# =========================
+# RUNNER
+# =========================
+def pending_cells(engine, job_id: int) -> list:
+    with engine.begin() as conn:
+        job = conn.execute(text("SELECT date_from, date_to, routes FROM lh_backfill_jobs WHERE id = :id"), {"id": job_id}).one()
+        done = set(conn.execute(text("""
+            SELECT route_key, flight_date FROM lh_backfill_cells WHERE job_id = :id AND status = 'done'
+        """), {"id": job_id}).all())
+        conn.execute(text("UPDATE lh_backfill_jobs SET status = 'running', updated_at = now() WHERE id = :id"), {"id": job_id})
+
+    days = date_range(job.date_from, job.date_to)
+    return [(route_key, day) for day in days for route_key in job.routes if (route_key, day) not in done]
+
+def save_checkpoint(engine, job_id: int, table, cells: list):
+    # Flights and their cell checkpoints commit together, so a crash never marks unsaved cells done
+    with engine.begin() as conn:
+        copy_upsert(conn, table)
+        conn.execute(SAVE_CELLS, [
+            {"job_id": job_id, "route_key": r, "flight_date": d, "status": "failed" if err else "done", "rows": n, "error": err}
+            for r, d, n, err in cells])
+        conn.execute(text("UPDATE lh_backfill_jobs SET updated_at = now() WHERE id = :id"), {"id": job_id})
+
+async def run_job(engine, job_id: int, fetch) -> bool:
+    # fetch(client, origin, dest, flight_date) -> (flights | None, error | None)
+    lock_conn = await asyncio.to_thread(try_advisory_lock, engine, BACKFILL_LOCK_KEY, job_id, label=f"Backfill {job_id}")
+    if lock_conn is None:
+        return False   # another worker is running it
+
+    try:
+        cells = await asyncio.to_thread(pending_cells, engine, job_id)
+        queue = asyncio.Queue()
+        for cell in cells:
+            queue.put_nowait(cell)
+
+        state = {"batch": FlightColumns(), "cells": []}
+        flush_lock = asyncio.Lock()
+
+        async def flush():
+            async with flush_lock:
+                if not state["cells"]:
+                    return
+                batch, done = state["batch"], state["cells"]
+                state["batch"], state["cells"] = FlightColumns(), []
+                table = batch.to_table(datetime.now(timezone.utc).isoformat())
+                await asyncio.to_thread(save_checkpoint, engine, job_id, table, done)
+
+        async def worker(client):
+            while not queue.empty():
+                route_key, day = queue.get_nowait()
+                origin, dest = route_key.split("-")
+                flights, error = await fetch(client, origin, dest, day.isoformat())
+                batch = state["batch"]
+                before = len(batch)
+                if flights:
+                    batch.extend(flights, route_key)
+                state["cells"].append((route_key, day, len(batch) - before, error))
+                if len(state["cells"]) >= CHECKPOINT_CELLS:
+                    await flush()
+
+        # TaskGroup: the first failing worker cancels the rest before the lock is released
+        async with httpx.AsyncClient(timeout=60) as client, asyncio.TaskGroup() as workers:
+            for _ in range(min(BACKFILL_CONCURRENCY, len(cells))):
+                workers.create_task(worker(client))
+        await flush()
+
+        status = await asyncio.to_thread(job_status, engine, job_id)
+        final = "done" if status["cells_failed"] == 0 else "partial"
+        await asyncio.to_thread(set_job_status, engine, job_id, final)
+        print(f"Backfill {job_id}: {final}, {status['cells_done']}/{status['cells_total']} cells, {status['flights']} flights")
+        return True
+    except asyncio.CancelledError:
+        raise   # worker shutdown: stays 'running' and is resumed from its checkpoints
+    except Exception as e:
+        cause = e.exceptions[0] if isinstance(e, ExceptionGroup) else e
+        print(f"Backfill {job_id} failed: {cause!r}")
+        await asyncio.to_thread(set_job_status, engine, job_id, "error")
+        return True
+    finally:
+        await asyncio.to_thread(release_advisory_lock, lock_conn, BACKFILL_LOCK_KEY, job_id)
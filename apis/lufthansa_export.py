@@ -0,0 +1,97 @@
+# 2026.10.18  21.00
+import hashlib
+import os
+import time
+from pathlib import Path
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sqlalchemy import text
+from apis.lufthansa_store import FLIGHT_COLUMNS
+
+# ----- 1. CONFIGURATION -----
+EXPORT_DIR = Path(os.getenv("LH_EXPORT_DIR", "/tmp/lufthansa_exports"))
+EXPORT_CACHE_FILES = 20     # most recent exports kept on disk
+BATCH_ROWS = 20000          # rows per server-side cursor fetch / Parquet row group
+
+ARROW_TYPES = {"id": pa.int64(), "ingested_at": pa.timestamp("us", tz="UTC")}
+EXPORT_COLUMNS = ["id"] + FLIGHT_COLUMNS + ["ingested_at"]
+DEFAULT_COLUMNS = [
+    "id", "route_key", "departure_airport_code", "departure_terminal_gate", "departure_status_code", "arrival_airport_code",
+    "arrival_terminal_gate", "arrival_status_code", "operatingcarrier_airlineid", "operatingcarrier_flightnumber", "equipment_aircraftcode",
+]
+
+
+# ----- 2. QUERY + CACHE KEY -----
+def build_query(columns: list, date_from: str = None, date_to: str = None, routes: list = None):
+    # Column names come from EXPORT_COLUMNS only; filter values are bound parameters
+    where, params = [], {}
+    if date_from:
+        where.append("departure_scheduled_date >= %(date_from)s")
+        params["date_from"] = date_from
+    if date_to:
+        where.append("departure_scheduled_date <= %(date_to)s")
+        params["date_to"] = date_to
+    if routes:
+        where.append("route_key = ANY(%(routes)s)")
+        params["routes"] = routes
+
+    select = ", ".join("ingested_at::timestamptz AS ingested_at" if c == "ingested_at" else c for c in columns)
+    sql = f"SELECT {select} FROM lufthansa"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    return sql + " ORDER BY id DESC", params
+
+# Upserts give every inserted or changed row a new id, so max(id) (a primary-key lookup) covers both.
+# Deletes never raise it; the table's cumulative delete counter from the statistics system covers those
+# (it trails a commit by a second or so, and a stats reset only costs one cache miss).
+# No table scan, so ETag hits cost two cheap lookups.
+DATA_VERSION = text("""
+    SELECT COALESCE(max(id), 0), pg_stat_get_tuples_deleted('lufthansa'::regclass) FROM lufthansa
+""")
+
+def data_version(engine) -> str:
+    with engine.connect() as conn:
+        max_id, deleted = conn.execute(DATA_VERSION).one()
+    return f"{max_id}-{deleted}"
+
+def export_key(version: str, columns: list, date_from, date_to, routes) -> str:
+    spec = f"{version}|{','.join(columns)}|{date_from}|{date_to}|{','.join(sorted(routes or []))}"
+    return hashlib.sha1(spec.encode()).hexdigest()[:20]
+
+def cached_export(key: str):
+    path = EXPORT_DIR / f"{key}.parquet"
+    return path if path.exists() else None
+
+
+# ----- 3. STREAMING EXPORT -----
+def stream_export(engine, key: str, columns: list, sql: str, params: dict):
+    # Yields Parquet bytes row group by row group; the same bytes land in the disk cache
+    schema = pa.schema([(c, ARROW_TYPES.get(c, pa.string())) for c in columns])
+    EXPORT_DIR.mkdir(parents=True, exist_ok=True)
+    tmp = EXPORT_DIR / f".{key}-{os.getpid()}-{time.time_ns()}.tmp"
+    done = False
+
+    try:
+        with engine.connect() as conn, open(tmp, "w+b") as out, open(tmp, "rb") as reader:
+            writer = pq.ParquetWriter(out, schema, compression="zstd")
+            with conn.connection.driver_connection.cursor(name=f"lh_export_{key}") as cur:
+                cur.execute(sql, params)
+                while rows := cur.fetchmany(BATCH_ROWS):
+                    arrays = [pa.array(values, schema.field(i).type) for i, values in enumerate(zip(*rows))]
+                    writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=schema))
+                    out.flush()
+                    yield reader.read()
+            writer.close()
+            out.flush()
+            yield reader.read()
+        os.replace(tmp, EXPORT_DIR / f"{key}.parquet")
+        done = True
+        prune_exports()
+    finally:
+        if not done:
+            tmp.unlink(missing_ok=True)   # client disconnected or the query failed
+
+def prune_exports():
+    files = sorted(EXPORT_DIR.glob("*.parquet"), key=lambda p: p.stat().st_mtime, reverse=True)
+    for path in files[EXPORT_CACHE_FILES:]:
+        path.unlink(missing_ok=True)
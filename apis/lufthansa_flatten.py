@@ -0,0 +1,61 @@
+# 2026.10.18  19.00
+import pyarrow as pa
+
+# ----- Fixed-schema flattening of FlightInformation.Flights.Flight records -----
+# Only the fields we keep are read, straight into per-column lists, so a sweep
+# builds one Arrow table instead of json_normalize + concat + drop + rename copies.
+
+FIELDS = [
+    ("departure_airport_code",        ("Departure", "AirportCode")),
+    ("departure_scheduled_date",      ("Departure", "Scheduled", "Date")),
+    ("departure_scheduled_time",      ("Departure", "Scheduled", "Time")),
+    ("departure_actual_date",         ("Departure", "Actual", "Date")),
+    ("departure_actual_time",         ("Departure", "Actual", "Time")),
+    ("departure_terminal_gate",       ("Departure", "Terminal", "Gate")),
+    ("departure_status_code",         ("Departure", "Status", "Code")),
+    ("arrival_airport_code",          ("Arrival", "AirportCode")),
+    ("arrival_scheduled_date",        ("Arrival", "Scheduled", "Date")),
+    ("arrival_scheduled_time",        ("Arrival", "Scheduled", "Time")),
+    ("arrival_actual_date",           ("Arrival", "Actual", "Date")),
+    ("arrival_actual_time",           ("Arrival", "Actual", "Time")),
+    ("arrival_terminal_gate",         ("Arrival", "Terminal", "Gate")),
+    ("arrival_status_code",           ("Arrival", "Status", "Code")),
+    ("operatingcarrier_airlineid",    ("OperatingCarrier", "AirlineID")),
+    ("operatingcarrier_flightnumber", ("OperatingCarrier", "FlightNumber")),
+    ("equipment_aircraftcode",        ("Equipment", "AircraftCode")),
+    ("status_code",                   ("Status", "Code")),
+]
+
+COLUMNS = [name for name, _ in FIELDS] + ["route_key", "ingested_at"]
+SCHEMA = pa.schema([(name, pa.string()) for name in COLUMNS])
+
+
+def _value(record, path):
+    for key in path:
+        if not isinstance(record, dict):
+            return None
+        record = record.get(key)
+    if record is None or isinstance(record, (dict, list)):
+        return None
+    return record if isinstance(record, str) else str(record)
+
+
+class FlightColumns:
+    def __init__(self):
+        self.columns = {name: [] for name in COLUMNS[:-1]}
+
+    def __len__(self):
+        return len(self.columns["route_key"])
+
+    def extend(self, flights, route_key: str):
+        # The API returns a bare object instead of a list when a route has one flight
+        if isinstance(flights, dict):
+            flights = [flights]
+        for name, path in FIELDS:
+            self.columns[name].extend(_value(f, path) for f in flights)
+        self.columns["route_key"].extend([route_key] * len(flights))
+
+    def to_table(self, ingested_at: str) -> pa.Table:
+        arrays = [pa.array(self.columns[name], pa.string()) for name in COLUMNS[:-1]]
+        arrays.append(pa.array([ingested_at] * len(self), pa.string()))
+        return pa.Table.from_arrays(arrays, schema=SCHEMA)
@@ -0,0 +1,54 @@
+# 2026.10.18  23.00
+import gzip
+import json
+import os
+import time
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+
+# ----- 1. CONFIGURATION -----
+ROUTE_CACHE_DIR = Path(os.getenv("LH_ROUTE_CACHE_DIR", "data/lufthansa_routes"))
+ROUTE_CACHE_TTL = int(os.getenv("LH_ROUTE_CACHE_TTL", "300"))   # seconds, for dates that can still change
+SETTLED_AFTER_DAYS = 2                                          # a date this many days past no longer changes
+
+
+# ----- 2. ROUTE RESPONSE CACHE -----
+# <ROUTE_CACHE_DIR>/<flight_date>/<origin>-<dest>.json.gz holds the raw Flight list ([] = no flights).
+# A file written after its date settled is permanent; anything older follows the TTL,
+# so a snapshot taken while flights were still in the air is refetched once.
+class RouteCache:
+    def __init__(self, root: Path = ROUTE_CACHE_DIR, ttl: float = ROUTE_CACHE_TTL):
+        self.root = root
+        self.ttl = ttl
+
+    def _path(self, origin: str, dest: str, flight_date: str):
+        try:
+            day = date.fromisoformat(flight_date)
+        except ValueError:
+            return None, None
+        settled_at = datetime(day.year, day.month, day.day, tzinfo=timezone.utc) + timedelta(days=SETTLED_AFTER_DAYS)
+        return self.root / day.isoformat() / f"{origin}-{dest}.json.gz", settled_at.timestamp()
+
+    def get(self, origin: str, dest: str, flight_date: str):
+        # Returns the cached flights, or None on a miss
+        path, settled_at = self._path(origin, dest, flight_date)
+        if path is None:
+            return None
+        try:
+            mtime = path.stat().st_mtime
+            if mtime < settled_at and time.time() - mtime > self.ttl:
+                return None
+            with gzip.open(path, "rt") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def put(self, origin: str, dest: str, flight_date: str, flights):
+        path, _ = self._path(origin, dest, flight_date)
+        if path is None:
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.parent / f".{path.name}.{os.getpid()}.tmp"
+        with gzip.open(tmp, "wt", compresslevel=6) as f:
+            json.dump(flights or [], f, separators=(",", ":"))
+        os.replace(tmp, path)
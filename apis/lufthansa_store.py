@@ -0,0 +1,101 @@
+# 2026.10.18  20.00
+import pyarrow as pa
+from sqlalchemy import text
+from apis.lufthansa_flatten import FIELDS
+
+# =========================
+# CONFIG
+# =========================
+SCHEMA_LOCK_KEY = 7301002                         # serialises ensure_schema across workers
+FLIGHT_KEY = ["departure_scheduled_date", "departure_scheduled_time", "route_key"]
+FLIGHT_COLUMNS = [name for name, _ in FIELDS] + ["route_key"]
+COPY_COLUMNS = FLIGHT_COLUMNS + ["ingested_at"]
+schema_ready = False                              # per process; ensure_schema runs on the first upsert
+
+# Hash over the flight fields only, so a re-sweep with unchanged data is a no-op
+CONTENT_HASH = "md5(ROW({})::text)".format(", ".join(FLIGHT_COLUMNS))
+
+# =========================
+# DDL
+# =========================
+CREATE_LUFTHANSA = """
+    CREATE TABLE IF NOT EXISTS lufthansa (
+        id BIGSERIAL PRIMARY KEY,
+        {},
+        ingested_at TIMESTAMPTZ
+    )
+""".format(",\n        ".join(f"{name} TEXT" for name in FLIGHT_COLUMNS))
+
+# Tables created by the old ingestion workflow may lack newer columns
+ADD_MISSING_COLUMNS = "ALTER TABLE lufthansa " + ", ".join(
+    [f"ADD COLUMN IF NOT EXISTS {name} TEXT" for name in FLIGHT_COLUMNS]
+    + ["ADD COLUMN IF NOT EXISTS ingested_at TIMESTAMPTZ", "ADD COLUMN IF NOT EXISTS content_hash TEXT"])
+
+# One current row per flight; also serves the page's ORDER BY
+CREATE_FLIGHT_KEY_INDEX = f"CREATE UNIQUE INDEX IF NOT EXISTS lufthansa_flight_key_idx ON lufthansa ({', '.join(FLIGHT_KEY)})"
+
+def _index_exists(conn, name: str) -> bool:
+    return conn.execute(text("SELECT to_regclass(:name) IS NOT NULL"), {"name": name}).scalar()
+
+def ensure_schema(conn):
+    conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": SCHEMA_LOCK_KEY})
+    conn.execute(text(CREATE_LUFTHANSA))
+    conn.execute(text(ADD_MISSING_COLUMNS))
+    if _index_exists(conn, "lufthansa_flight_key_idx"):
+        return
+
+    # Legacy append-only history: keep the latest row per flight (what the page used to pick)
+    key_match = " AND ".join(f"a.{c} = b.{c}" for c in FLIGHT_KEY)
+    deleted = conn.execute(text(f"DELETE FROM lufthansa a USING lufthansa b WHERE {key_match} AND a.id < b.id")).rowcount
+    conn.execute(text(f"UPDATE lufthansa SET content_hash = {CONTENT_HASH} WHERE content_hash IS NULL"))
+    conn.execute(text(CREATE_FLIGHT_KEY_INDEX))
+    print(f"Lufthansa schema: removed {deleted} duplicate rows, added unique flight key")
+
+# =========================
+# INGESTION (COPY -> staging -> upsert)
+# =========================
+# Changed rows get a fresh id, so id doubles as a "changed since" cursor
+UPSERT = """
+    INSERT INTO lufthansa ({cols}, content_hash)
+    SELECT DISTINCT ON ({key}) {cols}, {hash}
+    FROM lh_staging
+    WHERE {key_not_null}
+    ORDER BY {key}
+    ON CONFLICT ({key}) DO UPDATE SET
+        id = DEFAULT,
+        {updates},
+        content_hash = EXCLUDED.content_hash
+    WHERE lufthansa.content_hash IS DISTINCT FROM EXCLUDED.content_hash
+""".format(
+    cols=", ".join(COPY_COLUMNS),
+    key=", ".join(FLIGHT_KEY),
+    hash=CONTENT_HASH,
+    key_not_null=" AND ".join(f"{c} IS NOT NULL" for c in FLIGHT_KEY),
+    updates=",\n        ".join(f"{c} = EXCLUDED.{c}" for c in COPY_COLUMNS if c not in FLIGHT_KEY),
+)
+
+def copy_upsert(conn, table: pa.Table) -> int:
+    # Runs inside the caller's transaction; returns the number of inserted or changed rows
+    if table.num_rows == 0:
+        return 0
+
+    columns = [table.column(name).to_pylist() for name in COPY_COLUMNS]
+    conn.execute(text(f"CREATE TEMP TABLE lh_staging ON COMMIT DROP AS SELECT {', '.join(COPY_COLUMNS)} FROM lufthansa WITH NO DATA"))
+    with conn.connection.driver_connection.cursor() as cur:
+        with cur.copy(f"COPY lh_staging ({', '.join(COPY_COLUMNS)}) FROM STDIN") as copy:
+            for row in zip(*columns):
+                copy.write_row(row)
+
+    return conn.execute(text(UPSERT)).rowcount
+
+def upsert_flights(engine, table: pa.Table) -> int:
+    global schema_ready
+    if table.num_rows == 0:
+        return 0
+
+    with engine.begin() as conn:
+        if not schema_ready:
+            ensure_schema(conn)
+        changed = copy_upsert(conn, table)
+    schema_ready = True
+    return changed
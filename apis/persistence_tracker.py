@@ -0,0 +1,50 @@
+# 2026.10.18  16.00
+import numpy as np
+from sqlalchemy import text
+
+# ----- Rolling per-symbol appearance window -----
+# One int bitmask per symbol: bit 0 = latest run, bit N-1 = N runs ago.
+# A bit is set when the symbol scored >= threshold in that run, so
+# appearances = popcount = "qualified in how many of the last N runs".
+
+class PersistenceTracker:
+    def __init__(self, window: int = 3, threshold: float = 70):
+        self.window = window
+        self.threshold = threshold
+        self.full_mask = (1 << window) - 1
+        self.masks = {}
+        self.runs = 0
+
+    def appearances(self, symbols) -> np.ndarray:
+        masks = self.masks
+        return np.fromiter((masks.get(s, 0).bit_count() for s in symbols), dtype=np.int64, count=len(symbols))
+
+    def record_run(self, symbols, scores):
+        masks = {}
+        for symbol, mask in self.masks.items():
+            mask = (mask << 1) & self.full_mask
+            if mask:
+                masks[symbol] = mask
+
+        for symbol, score in zip(symbols, scores):
+            if score >= self.threshold:
+                masks[symbol] = masks.get(symbol, 0) | 1
+
+        self.masks = masks
+        self.runs += 1
+
+    def load(self, conn):
+        # Rebuild the window from the last N runs in the signals table (all rows of a run share one timestamp)
+        runs = conn.execute(text("SELECT DISTINCT timestamp FROM signals ORDER BY timestamp DESC LIMIT :n"), {"n": self.window}).scalars().all()
+        rows = conn.execute(text("""
+            SELECT timestamp, symbol FROM signals
+            WHERE timestamp = ANY(:runs) AND score >= :threshold
+        """), {"runs": list(runs), "threshold": self.threshold}).all()
+
+        by_run = {ts: [] for ts in runs}
+        for ts, symbol in rows:
+            by_run[ts].append(symbol)
+
+        self.masks, self.runs = {}, 0
+        for ts in sorted(runs):
+            self.record_run(by_run[ts], [self.threshold] * len(by_run[ts]))
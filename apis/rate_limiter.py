@@ -0,0 +1,102 @@
+# 2026.10.18  18.00
+import asyncio
+import fcntl
+import json
+import random
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+
+# ----- 1. TOKEN BUCKET -----
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate            # tokens per second
+        self.capacity = capacity    # burst size
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + max(0.0, now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, now: float) -> float:
+        self._refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+
+# ----- 2. LIMITER (all buckets + server-requested pauses) -----
+# With state_path the bucket state lives in a flock-guarded file, so every worker process
+# draws from one budget and a recycled worker doesn't start with a fresh hourly bucket.
+class RateLimiter:
+    def __init__(self, *buckets: TokenBucket, state_path: Path = None):
+        self.buckets = buckets
+        self.blocked_until = 0.0
+        self.state_path = state_path
+        self.clock = time.time if state_path else time.monotonic   # wall clock is comparable across processes
+        self.lock = asyncio.Lock()
+
+    @contextmanager
+    def _shared(self):
+        # Loads the other workers' state under an exclusive lock and writes ours back on exit
+        if self.state_path is None:
+            yield
+            return
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.state_path, "a+") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            f.seek(0)
+            try:
+                state = json.loads(f.read() or "null")
+            except ValueError:
+                state = None
+            if state and len(state["buckets"]) == len(self.buckets):
+                for b, (tokens, updated) in zip(self.buckets, state["buckets"]):
+                    b.tokens, b.updated = tokens, updated
+                self.blocked_until = state["blocked_until"]
+            yield
+            f.seek(0)
+            f.truncate()
+            json.dump({"buckets": [[b.tokens, b.updated] for b in self.buckets], "blocked_until": self.blocked_until}, f)
+
+    def _take(self) -> float:
+        # Takes one token from every bucket, or returns how long to wait for one
+        with self._shared():
+            now = self.clock()
+            wait = max([self.blocked_until - now] + [b.wait_time(now) for b in self.buckets])
+            if wait <= 0:
+                for b in self.buckets:
+                    b.tokens -= 1
+            return wait
+
+    async def acquire(self):
+        # Callers queue on the lock, so tokens are handed out in arrival order
+        async with self.lock:
+            while True:
+                wait = self._take()
+                if wait <= 0:
+                    return
+                await asyncio.sleep(wait)
+
+    def pause(self, seconds: float):
+        # 429 Retry-After applies to every caller, not just the one that got it
+        with self._shared():
+            self.blocked_until = max(self.blocked_until, self.clock() + seconds)
+
+
+def parse_retry_after(value) -> float | None:
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+def backoff_delay(attempt: int, base: float = 0.5, cap: float = 30.0) -> float:
+    # Exponential backoff with +-50% jitter
+    return min(cap, base * 2 ** attempt) * random.uniform(0.5, 1.5)
@@ -0,0 +1,92 @@
+# 2026.10.18  14.00
+import numpy as np
+import pandas as pd
+
+# =========================
+# CONFIG
+# =========================
+# Bands are read top-down like an if/elif chain: the first matching
+# (op, edge) wins, otherwise the default score applies.
+BANDS = {
+    "momentum":    ([("lt", 5, 20), ("le", 15, 100), ("le", 25, 70)], 40),    # change_pct
+    "volume":      ([("lt", 1, 30), ("le", 2, 70), ("le", 5, 100)], 80),      # volume / avg_volume
+    "volatility":  ([("lt", 2, 30), ("le", 6, 100), ("le", 12, 70)], 40),     # (high - low) / price * 100
+    "persistence": ([("lt", 1, 20), ("lt", 2, 40), ("lt", 3, 80)], 100),      # appearances
+    "leverage":    ([("lt", 10, 30), ("lt", 25, 60), ("lt", 50, 80)], 100),   # max leverage
+}
+
+# Summed in this order
+WEIGHTS = {"momentum": 0.25, "volume": 0.25, "volatility": 0.15, "persistence": 0.20, "leverage": 0.15}
+
+OUTPUT_COLUMNS = ["symbol", "price", "change_pct", "volume", "high", "low", "score"]
+
+# =========================
+# BAND SCORING
+# =========================
+def band_score(values, bands, default) -> np.ndarray:
+    x = np.asarray(values, dtype=np.float64)
+    conds = [x < edge if op == "lt" else x <= edge for op, edge, _ in bands]
+    return np.select(conds, [score for _, _, score in bands], default).astype(np.float64)
+
+def _max_leverage(market: dict):
+    return market.get("limits", {}).get("leverage", {}).get("max", 0)
+
+# =========================
+# PIPELINE
+# =========================
+def build_candidates(tickers: dict, markets: dict):
+    symbols = list(tickers)
+    values = list(tickers.values())
+
+    volumes = np.array([t.get("quoteVolume", 0) for t in values if t.get("quoteVolume")], dtype=np.float64)
+    avg_volume = np.mean(volumes) if len(volumes) else 0
+
+    df = pd.DataFrame({
+        "market": symbols,
+        "symbol": [s[:-5] for s in symbols],
+        "price": [t.get("last") for t in values],
+        "change_pct": [t.get("percentage", 0) for t in values],
+        "volume": [t.get("quoteVolume", 0) for t in values],
+        "high": [t.get("high") for t in values],
+        "low": [t.get("low") for t in values],
+        "max_leverage": [_max_leverage(markets.get(s, {})) for s in symbols],
+    })
+    for col in ["price", "change_pct", "volume", "high", "low", "max_leverage"]:
+        df[col] = pd.to_numeric(df[col], errors="coerce")
+
+    keep = (df["market"].str.contains("/USDT", regex=False) & df["price"].fillna(0).ne(0) & df["volume"].fillna(0).ne(0))
+    return df[keep].reset_index(drop=True), avg_volume
+
+def component_scores(df: pd.DataFrame, avg_volume, bands: dict = BANDS) -> pd.DataFrame:
+    # Expects an "appearances" column next to the build_candidates() columns
+    out = pd.DataFrame(index=df.index)
+    out["momentum_score"] = band_score(df["change_pct"], *bands["momentum"])
+
+    if avg_volume == 0:
+        out["volume_score"] = 50.0
+    else:
+        out["volume_score"] = band_score(df["volume"] / avg_volume, *bands["volume"])
+
+    high, low, price = df["high"], df["low"], df["price"]
+    invalid = (high.isna() | low.isna() | price.isna() | high.eq(0) | low.eq(0) | price.eq(0)).to_numpy()
+    out["volatility_score"] = np.where(invalid, 50.0, band_score((high - low) / price * 100, *bands["volatility"]))
+
+    out["persistence_score"] = band_score(df["appearances"].fillna(0), *bands["persistence"])
+    out["leverage_score"] = band_score(df["max_leverage"].fillna(0), *bands["leverage"])
+    return out
+
+def weighted_score(components: pd.DataFrame, weights: dict = WEIGHTS) -> pd.Series:
+    score = None
+    for name, weight in weights.items():
+        part = components[f"{name}_score"] * weight
+        score = part if score is None else score + part
+    return score.round(2)
+
+def to_records(df: pd.DataFrame) -> list:
+    out = df[OUTPUT_COLUMNS].astype(object)
+    return out.where(out.notna(), None).to_dict(orient="records")
+
+def top_signals(df: pd.DataFrame, score: pd.Series, min_score: float, limit: int) -> list:
+    ranked = df.assign(score=score)
+    ranked = ranked[ranked["score"] >= min_score].sort_values("score", ascending=False, kind="stable")
+    return to_records(ranked.head(limit))
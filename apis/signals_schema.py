@@ -0,0 +1,132 @@
+# 2026.10.18  15.00
+import os
+import re
+from datetime import date, datetime, timedelta
+from sqlalchemy import text
+
+# =========================
+# CONFIG
+# =========================
+RETENTION_DAYS = int(os.getenv("SIGNALS_RETENTION_DAYS", "30"))   # raw rows kept this long, then rolled up
+PARTITIONS_AHEAD = 2                                              # daily partitions created in advance
+
+# =========================
+# DDL
+# =========================
+CREATE_SIGNALS = """
+    CREATE TABLE IF NOT EXISTS signals (
+        symbol      TEXT NOT NULL,
+        timestamp   TIMESTAMP NOT NULL,
+        change_pct  DOUBLE PRECISION,
+        volume      DOUBLE PRECISION,
+        price       DOUBLE PRECISION,
+        score       DOUBLE PRECISION
+    ) PARTITION BY RANGE (timestamp)
+"""
+
+# Covers the persistence lookup (latest rows per symbol) as an index-only scan
+CREATE_SIGNALS_INDEX = "CREATE INDEX IF NOT EXISTS signals_symbol_ts_idx ON signals (symbol, timestamp DESC)"
+
+# Latest-run lookups (snapshot fallback, persistence tracker warm-up)
+CREATE_SIGNALS_TS_INDEX = "CREATE INDEX IF NOT EXISTS signals_ts_idx ON signals (timestamp DESC)"
+
+CREATE_SIGNALS_DAILY = """
+    CREATE TABLE IF NOT EXISTS signals_daily (
+        day         DATE NOT NULL,
+        symbol      TEXT NOT NULL,
+        runs        INTEGER NOT NULL,
+        avg_score   DOUBLE PRECISION,
+        max_score   DOUBLE PRECISION,
+        avg_change_pct DOUBLE PRECISION,
+        avg_volume  DOUBLE PRECISION,
+        avg_price   DOUBLE PRECISION,
+        PRIMARY KEY (day, symbol)
+    )
+"""
+
+def _relkind(conn, name: str):
+    query = text("""
+        SELECT c.relkind FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace
+        WHERE c.relname = :name AND n.nspname = current_schema()
+    """)
+    return conn.execute(query, {"name": name}).scalar()
+
+def _utc_today() -> date:
+    # signals.timestamp is stored as naive UTC
+    return datetime.utcnow().date()
+
+def _partition_name(day: date) -> str:
+    return f"signals_p{day:%Y%m%d}"
+
+def ensure_partitions(conn, today: date = None):
+    today = today or _utc_today()
+    for i in range(PARTITIONS_AHEAD + 1):
+        day = today + timedelta(days=i)
+        conn.execute(text(f"""
+            CREATE TABLE IF NOT EXISTS {_partition_name(day)} PARTITION OF signals
+            FOR VALUES FROM ('{day}') TO ('{day + timedelta(days=1)}')
+        """))
+
+def ensure_schema(conn):
+    # A pre-existing plain table is kept as signals_legacy and its rows copied over
+    migrate = _relkind(conn, "signals") == "r"
+    if migrate:
+        conn.execute(text("ALTER TABLE signals RENAME TO signals_legacy"))
+
+    conn.execute(text(CREATE_SIGNALS))
+    conn.execute(text(CREATE_SIGNALS_INDEX))
+    conn.execute(text(CREATE_SIGNALS_TS_INDEX))
+    conn.execute(text(CREATE_SIGNALS_DAILY))
+    ensure_partitions(conn)
+
+    if migrate:
+        conn.execute(text(f"""
+            CREATE TABLE IF NOT EXISTS signals_archive PARTITION OF signals
+            FOR VALUES FROM (MINVALUE) TO ('{_utc_today()}')
+        """))
+        conn.execute(text("""
+            INSERT INTO signals (symbol, timestamp, change_pct, volume, price, score)
+            SELECT symbol, timestamp, change_pct, volume, price, score FROM signals_legacy
+        """))
+
+# =========================
+# RETENTION / ROLLUP
+# =========================
+def _partitions(conn) -> list:
+    query = text("""
+        SELECT c.relname, pg_get_expr(c.relpartbound, c.oid)
+        FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'signals'::regclass
+    """)
+    out = []
+    for name, bound in conn.execute(query).all():
+        m = re.search(r"TO \('(\d{4}-\d{2}-\d{2})", bound or "")
+        if m:
+            out.append((name, date.fromisoformat(m.group(1))))
+    return out
+
+def apply_retention(conn, today: date = None) -> list:
+    # Rolls each expired partition up into signals_daily, then drops it
+    cutoff = (today or _utc_today()) - timedelta(days=RETENTION_DAYS)
+    dropped = []
+    for name, upper in _partitions(conn):
+        if upper > cutoff:
+            continue
+
+        conn.execute(text(f"""
+            INSERT INTO signals_daily (day, symbol, runs, avg_score, max_score, avg_change_pct, avg_volume, avg_price)
+            SELECT timestamp::date, symbol, COUNT(*), AVG(score), MAX(score), AVG(change_pct), AVG(volume), AVG(price)
+            FROM {name}
+            GROUP BY 1, 2
+            ON CONFLICT (day, symbol) DO NOTHING
+        """))
+        conn.execute(text(f"DROP TABLE {name}"))
+        dropped.append(name)
+    return dropped
+
+def run_maintenance(engine):
+    with engine.begin() as conn:
+        ensure_partitions(conn)
+        dropped = apply_retention(conn)
+    if dropped:
+        print(f"Signals retention: rolled up and dropped {', '.join(dropped)}")
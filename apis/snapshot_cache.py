@@ -0,0 +1,75 @@
+# 2026.10.18  13.00
+import asyncio
+import time
+from fastapi import Response
+
+# ----- Single-flight + stale-while-revalidate snapshots -----
+# Concurrent callers of the same key share one in-flight upstream fetch.
+#   age < ttl        -> served from the snapshot
+#   age < max_stale  -> served from the snapshot, refresh runs in the background
+#   older / missing  -> callers wait for the shared refresh
+# If a refresh fails, the last good snapshot is served and marked stale.
+
+class SnapshotCache:
+    def __init__(self, ttl: float, max_stale: float):
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self.entries = {}    # key -> (value, fetched_at)
+        self.inflight = {}   # key -> asyncio.Task
+
+    async def _run(self, key, fetch):
+        try:
+            value = await fetch()
+            self.entries[key] = (value, time.monotonic())
+            return True, value
+        except Exception as e:
+            print(f"Snapshot refresh failed for {key}: {e}")
+            return False, e
+        finally:
+            self.inflight.pop(key, None)
+
+    def _refresh(self, key, fetch) -> asyncio.Task:
+        task = self.inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._run(key, fetch))
+            self.inflight[key] = task
+        return task
+
+    def last(self, key):
+        # Last good value regardless of age, or None
+        entry = self.entries.get(key)
+        return entry[0] if entry else None
+
+    async def refresh(self, key, fetch):
+        # Waits for a fresh value (joining any in-flight fetch); raises on failure
+        ok, result = await asyncio.shield(self._refresh(key, fetch))
+        if not ok:
+            raise result
+        return result
+
+    async def get(self, key, fetch):
+        # Returns (value, meta); raises only when there is no snapshot to fall back on
+        entry = self.entries.get(key)
+        age = time.monotonic() - entry[1] if entry else None
+
+        if entry and age < self.ttl:
+            return entry[0], {"age": age, "stale": False}
+
+        task = self._refresh(key, fetch)
+        if entry and age < self.max_stale:
+            return entry[0], {"age": age, "stale": True}
+
+        # shield: a disconnecting client must not cancel the fetch other callers share
+        ok, result = await asyncio.shield(task)
+        if ok:
+            return result, {"age": 0.0, "stale": False}
+
+        entry = self.entries.get(key)
+        if entry is None:
+            raise result
+        return entry[0], {"age": time.monotonic() - entry[1], "stale": True}
+
+
+def set_snapshot_headers(response: Response, meta: dict):
+    response.headers["X-Snapshot-Age"] = f"{meta['age']:.1f}"
+    response.headers["X-Snapshot-Stale"] = "true" if meta["stale"] else "false"
@@ -0,0 +1,86 @@
+# 2026.10.18  18.00
+# Full ROUTES_FULL sweep against a local mock Lufthansa API that enforces the quota.
+#   python benchmarks/lufthansa_sweep.py [requests_per_second]
+import asyncio
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+PORT = 8765
+QUOTA = float(sys.argv[1]) if len(sys.argv) > 1 else 5.0
+
+# Must be set before apis.lufthansa_api is imported
+os.environ["LH_API_BASE"] = f"http://127.0.0.1:{PORT}/v1"
+os.environ["LH_RATE_PER_SEC"] = str(QUOTA)
+os.environ["LH_RATE_STATE"] = ""   # private limiter: runs must not drain the app's shared hourly budget
+os.environ.setdefault("LH_CLIENT_ID", "bench")
+os.environ.setdefault("LH_CLIENT_SECRET", "bench")
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import httpx
+import uvicorn
+from fastapi import FastAPI, Response
+from apis import lufthansa_api as lh
+from apis.rate_limiter import TokenBucket
+
+# ----- 1. MOCK SERVER -----
+mock = FastAPI()
+quota = TokenBucket(QUOTA, QUOTA)
+stats = {"ok": 0, "throttled": 0}
+
+@mock.post("/v1/oauth/token")
+async def token():
+    return {"access_token": "bench-token", "expires_in": 21600}
+
+@mock.get("/v1/operations/customerflightinformation/route/{origin}/{dest}/{flight_date}")
+async def route(origin: str, dest: str, flight_date: str, response: Response):
+    wait = quota.wait_time(time.monotonic())
+    if wait > 0:
+        stats["throttled"] += 1
+        response.status_code = 429
+        response.headers["Retry-After"] = "1"
+        return {"error": "quota exceeded"}
+    quota.tokens -= 1
+    stats["ok"] += 1
+    flight = {
+        "Departure": {"AirportCode": origin, "Scheduled": {"Date": flight_date, "Time": "10:00"}, "Status": {"Code": "DP", "Description": "Flight Departed"}},
+        "Arrival": {"AirportCode": dest, "Scheduled": {"Date": flight_date, "Time": "14:00"}, "Status": {"Code": "OT", "Description": "On Time"}},
+        "OperatingCarrier": {"AirlineID": "LH", "FlightNumber": "400"},
+        "Equipment": {"AircraftCode": "744"},
+        "Status": {"Code": "DP", "Description": "Flight Departed"},
+    }
+    return {"FlightInformation": {"Flights": {"Flight": [flight]}}}
+
+
+# ----- 2. SWEEP -----
+async def sweep(flight_date: str):
+    async with httpx.AsyncClient(timeout=60) as client:
+        await lh.lh_tokens.get(client)
+        started = time.monotonic()
+        results = await asyncio.gather(*[
+            lh.fetch_route(client, lh.lh_tokens, lh.lh_limiter, o, d, flight_date) for o, d in lh.ROUTES_FULL])
+        return time.monotonic() - started, results
+
+
+if __name__ == "__main__":
+    server = uvicorn.Server(uvicorn.Config(mock, host="127.0.0.1", port=PORT, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+
+    elapsed, results = asyncio.run(sweep("2026-10-18"))
+    server.should_exit = True
+
+    failed = [f"{o}-{d}: {err}" for (o, d), (_, err) in zip(lh.ROUTES_FULL, results) if err]
+    routes = len(lh.ROUTES_FULL)
+    ideal = max(0.0, (routes - QUOTA) / QUOTA)   # burst is free, the rest arrives at the quota rate
+
+    print(f"routes:       {routes}")
+    print(f"duration:     {elapsed:.2f}s (quota floor {ideal:.2f}s)")
+    print(f"throughput:   {stats['ok'] / elapsed:.2f} req/s (quota {QUOTA:g} req/s)")
+    print(f"throttled:    {stats['throttled']} (429 responses)")
+    print(f"failed:       {len(failed)}")
+    for line in failed:
+        print(f"  {line}")
@@ -8,9 +8,16 @@ import plotly.graph_objects as go
 
 from apis.lufthansa_api import sql_engine
 import pages.lufthansa_ml as lh_ml   
+import pages.lufthansa_models as lh_models
+from pages.lufthansa_data import FlightFrame, load_dataset, publish_dataset
 
 dash.register_page(__name__, icon="fa-plane", name="Lufthansa Tracker", order=2)
 
+REG_MODELS = ["lin", "tree_reg", "rf_reg", "gbm_reg", "hgb_reg"]
+CLF_MODELS = ["log", "tree_clf", "rf_clf", "gbm_clf", "hgb_clf"]
+
+flight_frame = FlightFrame()   # per worker; each tick only reads rows with id > last seen id
+
 CARD_STYLE = {
     "background": "rgba(255, 255, 255, 0.03)",
     "backdrop-filter": "blur(10px)",
@@ -126,23 +133,13 @@ layout = dbc.Container([
 )
 def load_data_render(_):
 
-    with sql_engine.connect() as conn:
-        query = """
-            SELECT DISTINCT ON (departure_scheduled_date, departure_scheduled_time, route_key) *
-            FROM lufthansa
-            ORDER BY departure_scheduled_date, departure_scheduled_time, route_key, id DESC
-        """
-        df = pd.read_sql(query, conn)
+    df, daily_counts, version = flight_frame.refresh(sql_engine)
 
     if df.empty:
         return "No data", html.Div("No data", className="text-light"), go.Figure(), None
 
-    # ---- Convert ingestion time ----
-    df["ingested_at"] = pd.to_datetime(df["ingested_at"])
-    df["ingested_at"] = (df["ingested_at"].dt.tz_convert("Europe/Budapest").dt.strftime("%Y-%m-%d %H:%M:%S"))
-    
     # ---- Build daily chart ----
-    daily = df.groupby(df["departure_scheduled_date"]).size().reset_index(name="count")
+    daily = daily_counts.rename_axis("departure_scheduled_date").reset_index(name="count")
     fig = px.bar(daily, x="departure_scheduled_date", y="count", template="plotly_dark")
     fig.update_layout(height=250,  plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)', margin=dict(l=20, r=20, t=10, b=10))
 
@@ -151,7 +148,10 @@ def load_data_render(_):
     table = dbc.Table.from_dataframe(df.iloc[-100:, status_cols], striped=False, hover=True, responsive=True, borderless=True,
         className="text-light m-0", style={"backgroundColor": "transparent",  "--bs-table-bg": "transparent", "--bs-table-accent-bg": "transparent", "color": "white"})
 
-    return f"Updated → {df['ingested_at'].iloc[-1]}", table, fig, df.to_dict("records")
+    # The Store carries only the dataset version; the frame itself stays server-side
+    publish_dataset(df, version)
+
+    return f"Updated → {df['ingested_at'].iloc[-1]}", table, fig, version
 
 @callback(
         [Output('ml-kpi-lin', 'children'),
@@ -163,30 +163,21 @@ def load_data_render(_):
         State('lh-df-store','data')],
         prevent_initial_call=True)
     
-def run_ml_clicks(n_clicks, reg_choice, clf_choice, data):  
+def run_ml_clicks(n_clicks, reg_choice, clf_choice, version):  
     
-    if not data:
+    df = load_dataset(version)
+    if df is None:
         msg = "No data for ML"
-        return msg, "-", "-", "-"
+        return msg, "-", "-"
 
-    df = pd.DataFrame(data)
-    data_ml = lh_ml.prepare(df)
+    features = lh_ml.feature_set(df, version)   # parsed + split once per dataset version
 
     # -------------------------
     #   REGRESSION MODEL SWITCH
     # -------------------------
-    if reg_choice == "lin":
-        reg_model, reg_metrics = lh_ml.train_linear(data_ml)
-    elif reg_choice == "tree_reg":
-        reg_model, reg_metrics = lh_ml.train_tree_linear(data_ml)
-    elif reg_choice == "rf_reg":
-        reg_model, reg_metrics = lh_ml.train_rf_linear(data_ml)
-    elif reg_choice == "gbm_reg":
-        reg_model, reg_metrics = lh_ml.train_gbm_linear(data_ml)
-    elif reg_choice == "hgb_reg":
-        reg_model, reg_metrics = lh_ml.train_hgb_linear(data_ml) 
-    else:
-        reg_model, reg_metrics = lh_ml.train_linear(data_ml)
+    # Fitted models are reused until the dataset version changes
+    reg_choice = reg_choice if reg_choice in REG_MODELS else "lin"
+    reg_model, reg_metrics = lh_models.get_model(reg_choice, features, version)
 
     reg_kpi0 = html.Div([
         html.Div(f"RMSE: {reg_metrics['rmse']:.1f}"),
@@ -236,24 +227,14 @@ def run_ml_clicks(n_clicks, reg_choice, clf_choice, data):
 
 
     # Predict on latest rows
-    reg_pred = lh_ml.predict_latest_linear(reg_model, data_ml, n=15)
+    reg_pred = lh_ml.predict_latest_linear(reg_model, features, n=15)
 
     
     # -------------------------
     #   CLASSIFICATION MODEL SWITCH
     # -------------------------
-    if clf_choice == "log":
-        clf_model, clf_metrics = lh_ml.train_logistic(data_ml)
-    elif clf_choice == "tree_clf":
-        clf_model, clf_metrics = lh_ml.train_tree_logistic(data_ml)
-    elif clf_choice == "rf_clf":
-        clf_model, clf_metrics = lh_ml.train_rf_logistic(data_ml)
-    elif clf_choice == "gbm_clf":
-        clf_model, clf_metrics = lh_ml.train_gbm_logistic(data_ml)
-    elif clf_choice == "hgb_clf":
-        clf_model, clf_metrics = lh_ml.train_hgb_logistic(data_ml)
-    else:
-        clf_model, clf_metrics = lh_ml.train_logistic(data_ml)
+    clf_choice = clf_choice if clf_choice in CLF_MODELS else "log"
+    clf_model, clf_metrics = lh_models.get_model(clf_choice, features, version)
 
     clf_kpi0 = html.Div([
         html.Div(f"Accuracy:  {clf_metrics['acc']:.3f}"),
@@ -309,7 +290,7 @@ def run_ml_clicks(n_clicks, reg_choice, clf_choice, data):
     },
 )
 
-    clf_pred = lh_ml.predict_latest_logistic(clf_model, data_ml, n=15)
+    clf_pred = lh_ml.predict_latest_logistic(clf_model, features, n=15)
 
     comp = pd.merge(reg_pred, clf_pred, on=["route_key", "dep_sched"], how="outer", validate="one_to_one", sort=False)
     comp[["arrival_delay", "pred_delay"]] = comp[["arrival_delay", "pred_delay"]].astype("float64").round(1)
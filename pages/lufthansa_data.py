@@ -0,0 +1,135 @@
+# 2026.10.18  23.00
+import os
+import re
+import threading
+import time
+from pathlib import Path
+import pandas as pd
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+# ----- Server-side flight frame, refreshed by id delta -----
+# Ingestion upserts one row per flight and gives every inserted/changed row a new id,
+# so "id > last_id" returns the rows that changed since the previous refresh.
+# Ids are taken at insert but become visible at commit, so a lower id can appear after a higher
+# one was read. Before each read, a brief NOWAIT share lock (it waits for no one and holds off
+# writers for microseconds) records the last id handed out while no lufthansa writer is in flight:
+# every id up to it is final, so last_id moves there. When the lock is busy, last_id stays and the
+# window above it is re-read (merged on FLIGHT_KEY); writers on other tables don't matter.
+# Daily counts are adjusted for the delta instead of regrouping the whole frame.
+
+FLIGHT_KEY = ["departure_scheduled_date", "departure_scheduled_time", "route_key"]
+FULL_RELOAD_INTERVAL = 3600   # seconds; picks up deletes, which the id cursor can't see
+DISPLAY_TZ = "Europe/Budapest"
+
+DATASET_DIR = Path(os.getenv("LH_DATASET_DIR", "data/lufthansa_datasets"))
+DATASET_KEEP = 5              # versions kept on disk; older Store keys fall back to a reload
+VERSION_RE = re.compile(r"^\d+-\d+$")
+
+class FlightFrame:
+    def __init__(self):
+        self.df = None
+        self.daily = pd.Series(dtype="int64")
+        self.last_id = 0         # every id up to here is final and its row is in the frame
+        self.loaded_at = 0.0
+        self.version = None      # "<max id>-<row count>" of the DB snapshot the frame matches
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def _format(df: pd.DataFrame) -> pd.DataFrame:
+        if not df.empty:
+            ts = pd.to_datetime(df["ingested_at"], utc=True)
+            df["ingested_at"] = ts.dt.tz_convert(DISPLAY_TZ).dt.strftime("%Y-%m-%d %H:%M:%S")
+        return df
+
+    def _full_load(self, conn):
+        df = pd.read_sql(text(f"SELECT * FROM lufthansa ORDER BY {', '.join(FLIGHT_KEY)}"), conn)
+        self.df = self._format(df)
+        self.daily = df.groupby("departure_scheduled_date").size()
+        self.loaded_at = time.monotonic()
+
+    def _apply_delta(self, delta: pd.DataFrame):
+        # Re-read rows replace themselves, so their daily counts net out
+        delta = self._format(delta)
+        df = self.df.set_index(FLIGHT_KEY)
+        new = delta.set_index(FLIGHT_KEY)
+        replaced = df.index.isin(new.index)
+
+        # Changed flights leave their old date's count and join their new one
+        gone = df.index[replaced].get_level_values(0).value_counts()
+        came = new.index.get_level_values(0).value_counts()
+        daily = self.daily.sub(gone, fill_value=0).add(came, fill_value=0).astype("int64")
+        self.daily = daily[daily > 0].sort_index()
+
+        merged = pd.concat([df[~replaced], new]).sort_index(kind="stable").reset_index()
+        self.df = merged[self.df.columns]
+
+    @staticmethod
+    def _settled_id(engine):
+        # Last id handed out while no transaction is writing lufthansa, or None if one is
+        try:
+            with engine.begin() as conn:
+                conn.execute(text("LOCK TABLE lufthansa IN SHARE MODE NOWAIT"))
+                return conn.execute(text("SELECT COALESCE(pg_sequence_last_value(pg_get_serial_sequence('lufthansa', 'id')::regclass), 0)")).scalar()
+        except OperationalError:
+            return None
+
+    def refresh(self, engine):
+        # Returns (df, daily, version) snapshots; the frames are replaced, never mutated, so callers can hold them
+        with self.lock:
+            # Taken before the read's snapshot, so every id up to it is visible in the read
+            settled = self._settled_id(engine)
+            with engine.connect().execution_options(isolation_level="REPEATABLE READ") as conn:
+                # One snapshot for the version and the rows
+                max_id, rows = conn.execute(text("SELECT COALESCE(max(id), 0), count(*) FROM lufthansa")).one()
+
+                # First/hourly load, or row count off (deletes): reload, so the frame is exactly this version
+                if self.df is None or time.monotonic() - self.loaded_at > FULL_RELOAD_INTERVAL:
+                    self._full_load(conn)
+                else:
+                    delta = pd.read_sql(text("SELECT * FROM lufthansa WHERE id > :last_id ORDER BY id"), conn, params={"last_id": self.last_id})
+                    if not delta.empty:
+                        self._apply_delta(delta)
+                    if len(self.df) != rows:
+                        self._full_load(conn)
+            if settled is not None:
+                self.last_id = max(self.last_id, settled)
+
+            # From the DB snapshot, not the frame, so every worker names the same data the same way
+            self.version = f"{max_id}-{rows}"
+            return self.df, self.daily, self.version
+
+
+# ----- Versioned dataset files shared across workers -----
+# The browser Store holds only the version key; ML callbacks in any worker load the frame from here.
+datasets = {}   # version -> DataFrame, this worker's recent versions
+
+def publish_dataset(df: pd.DataFrame, version: str):
+    path = DATASET_DIR / f"{version}.parquet"
+    datasets[version] = df
+    for old in list(datasets)[:-2]:
+        datasets.pop(old, None)
+    if path.exists():
+        return
+
+    DATASET_DIR.mkdir(parents=True, exist_ok=True)
+    tmp = DATASET_DIR / f".{version}.{os.getpid()}.tmp"
+    df.to_parquet(tmp, engine="pyarrow", index=False)
+    os.replace(tmp, path)
+
+    files = sorted(DATASET_DIR.glob("*.parquet"), key=lambda p: p.stat().st_mtime, reverse=True)
+    for old in files[DATASET_KEEP:]:
+        old.unlink(missing_ok=True)
+
+def load_dataset(version: str):
+    # None when the key is malformed or the version has been pruned
+    if not version or not VERSION_RE.match(version):
+        return None
+    if version in datasets:
+        return datasets[version]
+    try:
+        df = pd.read_parquet(DATASET_DIR / f"{version}.parquet", engine="pyarrow")
+    except (OSError, ValueError):
+        return None
+    datasets[version] = df
+    return df
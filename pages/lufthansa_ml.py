@@ -12,15 +12,21 @@ from sklearn.pipeline import Pipeline
 from sklearn.impute import SimpleImputer
 from sklearn.metrics import mean_squared_error, r2_score, mean_absolute_error,  accuracy_score, precision_score, recall_score, f1_score
 
+FEATURES = ["dep_delay", "dep_hour", "dep_dow"]
+DT_FORMAT = "%Y-%m-%d %H:%M"   # Lufthansa date + time fields; anything else becomes NaT
+
 # ---- Clean + feature engineering ----
+def _datetime(d: pd.DataFrame, date_col: str, time_col: str) -> pd.Series:
+    return pd.to_datetime(d[date_col].astype(str) + " " + d[time_col].astype(str), format=DT_FORMAT, errors="coerce")
+
 def prepare(df: pd.DataFrame) -> pd.DataFrame:
     
-    d = df.copy()
+    d = df.reset_index(drop=True)
     d = d.replace({"null": np.nan})
-    d["dep_sched"] = pd.to_datetime(d["departure_scheduled_date"].astype(str) + " " + d["departure_scheduled_time"].astype(str), errors="coerce")
-    d["dep_actual"] = pd.to_datetime(d["departure_actual_date"].astype(str) + " " + d["departure_actual_time"].astype(str), errors="coerce")
-    d["arr_sched"] = pd.to_datetime(d["arrival_scheduled_date"].astype(str) + " " + d["arrival_scheduled_time"].astype(str), errors="coerce")
-    d["arr_actual"] = pd.to_datetime(d["arrival_actual_date"].astype(str) + " " + d["arrival_actual_time"].astype(str), errors="coerce")
+    d["dep_sched"] = _datetime(d, "departure_scheduled_date", "departure_scheduled_time")
+    d["dep_actual"] = _datetime(d, "departure_actual_date", "departure_actual_time")
+    d["arr_sched"] = _datetime(d, "arrival_scheduled_date", "arrival_scheduled_time")
+    d["arr_actual"] = _datetime(d, "arrival_actual_date", "arrival_actual_time")
 
     d["arrival_delay"] = (d["arr_actual"] - d["arr_sched"]).dt.total_seconds() / 60
     d["dep_delay"]     = (d["dep_actual"] - d["dep_sched"]).dt.total_seconds() / 60
@@ -30,6 +36,39 @@ def prepare(df: pd.DataFrame) -> pd.DataFrame:
 
     return d
 
+# ---- Shared feature matrix + splits (one per dataset version) ----
+class FeatureSet:
+    def __init__(self, df: pd.DataFrame):
+        self.data = prepare(df)
+        self.X = np.ascontiguousarray(self.data[FEATURES].to_numpy(dtype=np.float32, na_value=np.nan))   # NaN kept for prediction
+        self.X_filled = np.nan_to_num(self.X, nan=0.0)                                                      # training input (fillna(0))
+        self.splits = {}
+
+    def reg_split(self, random_state=42):
+        key = ("reg", random_state)
+        if key not in self.splits:
+            mask = self.data["arrival_delay"].notna().to_numpy()
+            y = self.data["arrival_delay"].to_numpy(dtype=float)[mask]
+            self.splits[key] = train_test_split(self.X_filled[mask], y, test_size=0.2, random_state=random_state)
+        return self.splits[key]
+
+    def clf_split(self, random_state=42):
+        key = ("clf", random_state)
+        if key not in self.splits:
+            mask = self.data["is_delayed"].notna().to_numpy()
+            y = self.data["is_delayed"][mask].to_numpy(dtype=int)
+            self.splits[key] = train_test_split(self.X_filled[mask], y, test_size=0.25, random_state=random_state, stratify=y)
+        return self.splits[key]
+
+feature_sets = {}   # dataset version -> FeatureSet, this worker's recent versions
+
+def feature_set(df: pd.DataFrame, version: str) -> FeatureSet:
+    if version not in feature_sets:
+        feature_sets[version] = FeatureSet(df)
+        for old in list(feature_sets)[:-2]:
+            feature_sets.pop(old, None)
+    return feature_sets[version]
+
 # ========= Regression (arrival_delay minutes) =========
 def reg_metrics(y_test, y_pred):
     metrics = { "rmse": float(np.sqrt(mean_squared_error(y_test, y_pred))),
@@ -37,46 +76,31 @@ def reg_metrics(y_test, y_pred):
                 "r2":   float(r2_score(y_test, y_pred)) }   
     return metrics
 
-def train_linear(df):
-    df = df.dropna(subset=["arrival_delay"]).copy()
-    X = df[["dep_delay", "dep_hour", "dep_dow"]].fillna(0)
-    y = df["arrival_delay"].astype(float)
-    X_tr, X_te, y_tr, y_te = train_test_split(X, y, test_size=0.2, random_state=42)
+def train_linear(features):
+    X_tr, X_te, y_tr, y_te = features.reg_split()
     model = Pipeline([("imputer", SimpleImputer(strategy="median")), ("regressor", LinearRegression())]).fit(X_tr, y_tr)
     return model, reg_metrics(y_te, model.predict(X_te))
 
-def train_tree_linear(df, max_depth=None, random_state=42):
-    d = df.dropna(subset=["arrival_delay"]).copy()
-    X = d[["dep_delay", "dep_hour", "dep_dow"]].fillna(0)
-    y = d["arrival_delay"].astype(float)
-    X_tr, X_te, y_tr, y_te = train_test_split(X, y, test_size=0.2, random_state=42)
+def train_tree_linear(features, max_depth=None, random_state=42):
+    X_tr, X_te, y_tr, y_te = features.reg_split()
     model = Pipeline([("imputer", SimpleImputer(strategy="median")), \
     ("regressor", DecisionTreeRegressor(max_depth=max_depth, random_state=random_state))]).fit(X_tr, y_tr)
     return model, reg_metrics(y_te, model.predict(X_te))
 
-def train_rf_linear(df, n_estimators=300, max_depth=None, random_state=42):
-    d = df.dropna(subset=["arrival_delay"]).copy()
-    X = d[["dep_delay", "dep_hour", "dep_dow"]].fillna(0)
-    y = d["arrival_delay"].astype(float)
-    X_tr, X_te, y_tr, y_te = train_test_split(X, y, test_size=0.2, random_state=42)
+def train_rf_linear(features, n_estimators=300, max_depth=None, random_state=42):
+    X_tr, X_te, y_tr, y_te = features.reg_split()
     model = Pipeline([("imputer", SimpleImputer(strategy="median")), \
     ("regressor", RandomForestRegressor(n_estimators=n_estimators, max_depth=max_depth, random_state=random_state))]).fit(X_tr, y_tr)
     return model, reg_metrics(y_te, model.predict(X_te))
 
-def train_gbm_linear(df, n_estimators=300, learning_rate=0.06, max_depth=3, random_state=42, subsample=1.0):
-    d = df.dropna(subset=["arrival_delay"]).copy()
-    X = d[["dep_delay", "dep_hour", "dep_dow"]].fillna(0)
-    y = d["arrival_delay"].astype(float)
-    X_tr, X_te, y_tr, y_te = train_test_split(X, y, test_size=0.2, random_state=random_state)
+def train_gbm_linear(features, n_estimators=300, learning_rate=0.06, max_depth=3, random_state=42, subsample=1.0):
+    X_tr, X_te, y_tr, y_te = features.reg_split(random_state)
     model = Pipeline([("imputer", SimpleImputer(strategy="median")), \
     ("regressor", GradientBoostingRegressor(n_estimators=n_estimators, learning_rate=learning_rate, max_depth=max_depth, subsample=subsample, random_state=random_state))]).fit(X_tr, y_tr)
     return model, reg_metrics(y_te, model.predict(X_te))
 
-def train_hgb_linear(df, learning_rate=0.06, max_depth=None, max_iter=300, random_state=42):
-    d = df.dropna(subset=["arrival_delay"]).copy()
-    X = d[["dep_delay", "dep_hour", "dep_dow"]].fillna(0)
-    y = d["arrival_delay"].astype(float)
-    X_tr, X_te, y_tr, y_te = train_test_split(X, y, test_size=0.2, random_state=random_state)
+def train_hgb_linear(features, learning_rate=0.06, max_depth=None, max_iter=300, random_state=42):
+    X_tr, X_te, y_tr, y_te = features.reg_split(random_state)
     model = Pipeline([("imputer", SimpleImputer(strategy="median")), \
     ("regressor", HistGradientBoostingRegressor(learning_rate=learning_rate, max_depth=max_depth, max_iter=max_iter, random_state=random_state))]).fit(X_tr, y_tr)
     return model, reg_metrics(y_te, model.predict(X_te))
@@ -89,47 +113,32 @@ def clf_metrics(y_test, y_pred):
                 "f1":   float(f1_score(y_test, y_pred, zero_division=0)) }
     return metrics
 
-def train_logistic(df):
-    d = df.dropna(subset=["is_delayed"]).copy()
-    X = d[["dep_delay", "dep_hour", "dep_dow"]].fillna(0)
-    y = d["is_delayed"].astype(int)
-    X_tr, X_te, y_tr, y_te = train_test_split(X, y, test_size=0.25, random_state=42, stratify=y)
+def train_logistic(features):
+    X_tr, X_te, y_tr, y_te = features.clf_split()
     model = Pipeline([("imputer", SimpleImputer(strategy="median")), \
     ("classifier",  LogisticRegression(max_iter=200, class_weight="balanced"))]).fit(X_tr, y_tr)
     return model, clf_metrics(y_te, model.predict(X_te))
 
-def train_tree_logistic(df, max_depth=None, random_state=42):
-    d = df.dropna(subset=["is_delayed"]).copy()
-    X = d[["dep_delay", "dep_hour", "dep_dow"]].fillna(0)
-    y = d["is_delayed"].astype(int)
-    X_tr, X_te, y_tr, y_te = train_test_split(X, y, test_size=0.25, random_state=42, stratify=y)
+def train_tree_logistic(features, max_depth=None, random_state=42):
+    X_tr, X_te, y_tr, y_te = features.clf_split()
     model = Pipeline([("imputer", SimpleImputer(strategy="median")), \
     ("classifier",  DecisionTreeClassifier(max_depth=max_depth, random_state=random_state))]).fit(X_tr, y_tr)
     return model, clf_metrics(y_te, model.predict(X_te))
 
-def train_rf_logistic(df, n_estimators=300, max_depth=None, random_state=42):
-    d = df.dropna(subset=["is_delayed"]).copy()
-    X = d[["dep_delay", "dep_hour", "dep_dow"]].fillna(0)
-    y = d["is_delayed"].astype(int) 
-    X_tr, X_te, y_tr, y_te = train_test_split(X, y, test_size=0.25, random_state=42, stratify=y)
+def train_rf_logistic(features, n_estimators=300, max_depth=None, random_state=42):
+    X_tr, X_te, y_tr, y_te = features.clf_split()
     model = Pipeline([("imputer", SimpleImputer(strategy="median")), \
     ("classifier",  RandomForestClassifier(n_estimators=n_estimators,max_depth=max_depth,random_state=random_state,class_weight="balanced"))]).fit(X_tr, y_tr)
     return model, clf_metrics(y_te, model.predict(X_te))
 
-def train_gbm_logistic(df, n_estimators=300, learning_rate=0.06, max_depth=3, random_state=42, subsample=1.0):
-    d = df.dropna(subset=["is_delayed"]).copy()  
-    X = d[["dep_delay", "dep_hour", "dep_dow"]].fillna(0)
-    y = d["is_delayed"].astype(int)
-    X_tr, X_te, y_tr, y_te = train_test_split(X, y, test_size=0.25, random_state=random_state, stratify=y)
+def train_gbm_logistic(features, n_estimators=300, learning_rate=0.06, max_depth=3, random_state=42, subsample=1.0):
+    X_tr, X_te, y_tr, y_te = features.clf_split(random_state)
     model = Pipeline([("imputer", SimpleImputer(strategy="median")), \
     ("classifier",  GradientBoostingClassifier(n_estimators=n_estimators, learning_rate=learning_rate,max_depth=max_depth, subsample=subsample, random_state=random_state))]).fit(X_tr, y_tr)
     return model, clf_metrics(y_te, model.predict(X_te))
 
-def train_hgb_logistic(df, learning_rate=0.06, max_depth=None, max_iter=300, random_state=42):
-    d = df.dropna(subset=["is_delayed"]).copy()
-    X = d[["dep_delay", "dep_hour", "dep_dow"]].fillna(0)
-    y = d["is_delayed"].astype(int)
-    X_tr, X_te, y_tr, y_te = train_test_split(X, y, test_size=0.25, random_state=random_state, stratify=y)
+def train_hgb_logistic(features, learning_rate=0.06, max_depth=None, max_iter=300, random_state=42):
+    X_tr, X_te, y_tr, y_te = features.clf_split(random_state)
     model = Pipeline([("imputer", SimpleImputer(strategy="median")), \
     ("classifier",  HistGradientBoostingClassifier(learning_rate=learning_rate, max_depth=max_depth, max_iter=max_iter, random_state=random_state))]).fit(X_tr, y_tr)
     return model, clf_metrics(y_te, model.predict(X_te))
@@ -138,17 +147,20 @@ def train_hgb_logistic(df, learning_rate=0.06, max_depth=None, max_iter=300, ran
 #  Predictions
 # ======================================================
 
-def predict_latest_linear(model, df: pd.DataFrame, n=12):
-    latest = df.sort_values("dep_sched", ascending=False).head(n).copy()
-    X = latest[["dep_delay", "dep_hour", "dep_dow"]]
+def _latest(features: FeatureSet, n):
+    # Most recent n flights and their (unfilled) feature rows
+    latest = features.data.sort_values("dep_sched", ascending=False, kind="stable").head(n).copy()
+    return latest, features.X[latest.index.to_numpy()]
+
+def predict_latest_linear(model, features: FeatureSet, n=12):
+    latest, X = _latest(features, n)
     latest["pred_delay"] = model.predict(X)
 
     cols = ["route_key", "dep_sched", "arrival_delay", "pred_delay"]
     return latest[[c for c in cols if c in latest.columns]]
 
-def predict_latest_logistic(model, df: pd.DataFrame, n=12):
-    latest = df.sort_values("dep_sched", ascending=False).head(n).copy()
-    X = latest[["dep_delay", "dep_hour", "dep_dow"]]
+def predict_latest_logistic(model, features: FeatureSet, n=12):
+    latest, X = _latest(features, n)
 
     proba = model.predict_proba(X)[:, 1]
     latest["pred_prob_delay"] = proba
@@ -156,9 +168,3 @@ def predict_latest_logistic(model, df: pd.DataFrame, n=12):
 
     cols = ["route_key", "dep_sched", "pred_prob_delay", "pred_flag_delay"]
     return latest[[c for c in cols if c in latest.columns]]
-
-
-
-
-
-
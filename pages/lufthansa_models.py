@@ -0,0 +1,78 @@
+# 2026.10.19  00.00
+import fcntl
+import hashlib
+import inspect
+import json
+import os
+import time
+from pathlib import Path
+import joblib
+import pages.lufthansa_ml as lh_ml
+
+# ----- Trained-model registry -----
+# key = (model type, hyperparameters, dataset version); a fitted pipeline + metrics per key
+# is stored once as joblib and shared by every worker, so a click only trains after new data.
+
+MODEL_DIR = Path(os.getenv("LH_MODEL_DIR", "data/lufthansa_models"))
+MODEL_KEEP = 20   # most recent fitted models kept on disk (~two dataset versions of every type)
+
+TRAINERS = {
+    "lin":      lh_ml.train_linear,
+    "tree_reg": lh_ml.train_tree_linear,
+    "rf_reg":   lh_ml.train_rf_linear,
+    "gbm_reg":  lh_ml.train_gbm_linear,
+    "hgb_reg":  lh_ml.train_hgb_linear,
+    "log":      lh_ml.train_logistic,
+    "tree_clf": lh_ml.train_tree_logistic,
+    "rf_clf":   lh_ml.train_rf_logistic,
+    "gbm_clf":  lh_ml.train_gbm_logistic,
+    "hgb_clf":  lh_ml.train_hgb_logistic,
+}
+
+models = {}   # key -> (model, metrics), this worker's hits
+
+def hyperparameters(model_type: str, overrides: dict = None) -> dict:
+    # Trainer defaults are part of the key, so changing a default retrains
+    params = {name: p.default for name, p in inspect.signature(TRAINERS[model_type]).parameters.items() if p.default is not inspect.Parameter.empty}
+    params.update(overrides or {})
+    return params
+
+def model_key(model_type: str, params: dict, dataset_version: str) -> str:
+    spec = json.dumps({"model": model_type, "params": params, "dataset": dataset_version}, sort_keys=True, default=str)
+    return f"{model_type}-{hashlib.sha1(spec.encode()).hexdigest()[:16]}"
+
+def get_model(model_type: str, features, dataset_version: str, **overrides):
+    # Returns (model, metrics); trains and stores only on a miss
+    params = hyperparameters(model_type, overrides)
+    key = model_key(model_type, params, dataset_version)
+    if key in models:
+        return models[key]
+
+    path = MODEL_DIR / f"{key}.joblib"
+    MODEL_DIR.mkdir(parents=True, exist_ok=True)
+
+    # Per-key file lock: concurrent clicks in other workers wait for this fit instead of repeating it
+    with open(MODEL_DIR / f".{key}.lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        if path.exists():
+            entry = joblib.load(path)
+        else:
+            started = time.monotonic()
+            model, metrics = TRAINERS[model_type](features, **overrides)
+            entry = {"model": model, "metrics": metrics, "params": params, "dataset_version": dataset_version,
+                     "fit_seconds": round(time.monotonic() - started, 3)}
+            tmp = MODEL_DIR / f".{key}.{os.getpid()}.tmp"
+            joblib.dump(entry, tmp)   # uncompressed: a 300-tree forest loads ~2x faster
+            os.replace(tmp, path)
+            prune_models()
+
+    models[key] = entry["model"], entry["metrics"]
+    for old in list(models)[:-len(TRAINERS)]:
+        models.pop(old, None)
+    return models[key]
+
+def prune_models():
+    files = sorted(MODEL_DIR.glob("*.joblib"), key=lambda p: p.stat().st_mtime, reverse=True)
+    for old in files[MODEL_KEEP:]:
+        old.unlink(missing_ok=True)
+        (MODEL_DIR / f".{old.stem}.lock").unlink(missing_ok=True)